@@ -1,11 +1,14 @@
 import uuid
 import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Iterator, Tuple
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
-import json
+from fastapi.responses import FileResponse, StreamingResponse
+import orjson
+import os
 import shutil
+import time
+import zipfile
 from pathlib import Path
 
 from app.models.schemas import (
@@ -13,6 +16,8 @@ from app.models.schemas import (
     AnalysisResult, ErrorResponse, HealthResponse
 )
 from app.core.database import AnalysisTaskManager, ModelUsageManager
+from app.core.cache import task_cache
+from app.core.queue import get_task_queue, store_task_secret
 from app.services.test_generator_service import TestGeneratorService
 from app.core.config import get_settings
 from app.core.logging import get_logger
@@ -21,8 +26,70 @@ logger = get_logger(__name__)
 
 router = APIRouter()
 
-# Store active tasks (in production, use Redis or database)
-active_tasks: Dict[str, Dict[str, Any]] = {}
+# Progress updates are persisted to MongoDB at most every 5% or 500ms
+PROGRESS_WRITE_MIN_DELTA = 5
+PROGRESS_WRITE_MIN_INTERVAL = 0.5
+
+# Task fields needed by endpoints that don't return the stored results
+TASK_STATUS_PROJECTION = {
+    "_id": 0,
+    "status": 1,
+    "current_step": 1,
+    "progress_percentage": 1,
+    "created_at": 1,
+    "started_at": 1,
+    "completed_at": 1,
+    "error_message": 1
+}
+TASK_DOWNLOAD_PROJECTION = {
+    "_id": 0,
+    "status": 1,
+    "test_files_path": 1,
+    "coverage_report_path": 1
+}
+
+# Status responses are reused for 250ms to absorb frontend polling
+STATUS_CACHE_TTL = 0.25
+STATUS_CACHE_MAX_SIZE = 10000
+_status_cache: Dict[str, Tuple[float, TaskStatusResponse]] = {}
+
+# Limits concurrently running analyses, created lazily from settings
+_analysis_semaphore: Optional[asyncio.Semaphore] = None
+
+def _get_analysis_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent analyses"""
+    global _analysis_semaphore
+    if _analysis_semaphore is None:
+        _analysis_semaphore = asyncio.Semaphore(get_settings().max_concurrent_analyses)
+    return _analysis_semaphore
+
+# Archive directories, resolved (and created) once per process
+_dirs_initialized = False
+_downloads_dir: Optional[Path] = None
+_temp_dir: Optional[Path] = None
+
+def _init_archive_dirs():
+    """Resolve downloads/temp directories once instead of on every download"""
+    global _dirs_initialized, _downloads_dir, _temp_dir
+    if not _dirs_initialized:
+        settings = get_settings()
+        _downloads_dir = settings.downloads_dir
+        _temp_dir = settings.temp_dir
+        _downloads_dir.mkdir(exist_ok=True)
+        _dirs_initialized = True
+
+def _load_json_field(value: Any, default: Any) -> Any:
+    """Return a stored field as a native value, decoding legacy JSON strings"""
+    if isinstance(value, type(default)):
+        return value
+    if isinstance(value, str):
+        try:
+            decoded = orjson.loads(value)
+        except ValueError as e:
+            logger.error(f"Error parsing stored JSON field: {e}")
+            return default
+        return decoded if isinstance(decoded, type(default)) else default
+    return default
 
 @router.post("/analyze", response_model=AnalysisResponse)
 async def start_analysis(
@@ -57,10 +124,10 @@ async def start_analysis(
             "analysis_summary": None
         }
         
-        AnalysisTaskManager.create_task(task_data)
+        await AnalysisTaskManager.create_task(task_data)
         
         # Store task info
-        active_tasks[task_id] = {
+        await task_cache.set_task(task_id, {
             "status": "pending",
             "progress": 0,
             "current_step": "Initializing...",
@@ -68,15 +135,36 @@ async def start_analysis(
             "completed_at": None,
             "results": None,
             "error": None
-        }
+        })
         
-        # Start background task
-        background_tasks.add_task(
-            run_analysis_task,
-            task_id,
-            request.repository_url,
-            request.api_key
-        )
+        # Start background task (on the Redis queue worker when enabled, otherwise in-process)
+        if get_settings().use_task_queue:
+            try:
+                # Job arguments are stored in plaintext by Arq, so the API key travels separately
+                if request.api_key:
+                    await store_task_secret(task_id, request.api_key)
+                task_queue = await get_task_queue()
+                await task_queue.enqueue_job(
+                    "run_analysis_task",
+                    task_id,
+                    str(request.repository_url)
+                )
+            except Exception as e:
+                # Nothing will ever pick the task up, so it must not stay pending
+                await AnalysisTaskManager.update_task(task_id, {
+                    "status": "failed",
+                    "completed_at": datetime.utcnow(),
+                    "error_message": f"Could not queue analysis: {e}"
+                })
+                await task_cache.update_task(task_id, {"status": "failed", "error": str(e)})
+                raise
+        else:
+            background_tasks.add_task(
+                run_analysis_task,
+                task_id,
+                request.repository_url,
+                request.api_key
+            )
         
         logger.info(f"Started analysis task {task_id} for repository {request.repository_url}")
         
@@ -96,15 +184,20 @@ async def get_task_status(task_id: str):
     """Get the status of an analysis task"""
     
     try:
+        # Absorb frontend polling with a short-lived in-process cache
+        cached = _status_cache.get(task_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
         # Get task from MongoDB
-        task = AnalysisTaskManager.get_task(task_id)
+        task = await AnalysisTaskManager.get_task(task_id, TASK_STATUS_PROJECTION)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         
         # Get current task info
-        task_info = active_tasks.get(task_id, {})
+        task_info = await task_cache.get_task(task_id)
         
-        return TaskStatusResponse(
+        status_response = TaskStatusResponse(
             task_id=task_id,
             status=task["status"],
             current_step=task_info.get("current_step", task.get("current_step", "Unknown")),
@@ -115,6 +208,16 @@ async def get_task_status(task_id: str):
             error_message=task.get("error_message")
         )
         
+        now = time.monotonic()
+        if len(_status_cache) >= STATUS_CACHE_MAX_SIZE:
+            for key in [k for k, (expires_at, _) in _status_cache.items() if expires_at <= now]:
+                del _status_cache[key]
+            if len(_status_cache) >= STATUS_CACHE_MAX_SIZE:
+                _status_cache.clear()
+        _status_cache[task_id] = (now + STATUS_CACHE_TTL, status_response)
+        
+        return status_response
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -126,67 +229,24 @@ async def get_analysis_results(task_id: str):
     """Get analysis results for a completed task"""
     try:
         # Get task from MongoDB
-        task = AnalysisTaskManager.get_task(task_id)
+        task = await AnalysisTaskManager.get_task(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         
         # Parse detected_languages from MongoDB data first
-        detected_languages = []
-        if task.get("detected_languages"):
-            try:
-                if isinstance(task["detected_languages"], str):
-                    detected_languages = json.loads(task["detected_languages"])
-                elif isinstance(task["detected_languages"], list):
-                    detected_languages = task["detected_languages"]
-                else:
-                    detected_languages = []
-            except Exception:
-                detected_languages = []
+        detected_languages = _load_json_field(task.get("detected_languages"), [])
         
         # Get task results
-        task_info = active_tasks.get(task_id, {})
+        task_info = await task_cache.get_task(task_id)
         results = task_info.get("results")
         
-        # If results not in active_tasks (e.g., after server restart), try to reconstruct from MongoDB
+        # If results not in the task cache (e.g., after expiry), try to reconstruct from MongoDB
         if not results:
-            logger.warning(f"Results not found in active_tasks for {task_id}, attempting to reconstruct from MongoDB")
-            
-            # Parse analysis_summary from MongoDB data
-            analysis_summary = None
-            if task.get("analysis_summary"):
-                try:
-                    if isinstance(task["analysis_summary"], str):
-                        analysis_summary = json.loads(task["analysis_summary"])
-                    elif isinstance(task["analysis_summary"], dict):
-                        analysis_summary = task["analysis_summary"]
-                    else:
-                        analysis_summary = {}
-                except Exception:
-                    analysis_summary = {}
-            
-            # Parse test generation data from MongoDB
-            test_generation_data = {}
-            if task.get("test_generation_data"):
-                try:
-                    if isinstance(task["test_generation_data"], str):
-                        test_generation_data = json.loads(task["test_generation_data"])
-                    elif isinstance(task["test_generation_data"], dict):
-                        test_generation_data = task["test_generation_data"]
-                except Exception as e:
-                    logger.error(f"Error parsing test_generation_data: {e}")
-                    test_generation_data = {}
+            logger.warning(f"Results not found in task cache for {task_id}, attempting to reconstruct from MongoDB")
             
-            # Parse coverage results data from MongoDB
-            coverage_results_data = {}
-            if task.get("coverage_results_data"):
-                try:
-                    if isinstance(task["coverage_results_data"], str):
-                        coverage_results_data = json.loads(task["coverage_results_data"])
-                    elif isinstance(task["coverage_results_data"], dict):
-                        coverage_results_data = task["coverage_results_data"]
-                except Exception as e:
-                    logger.error(f"Error parsing coverage_results_data: {e}")
-                    coverage_results_data = {}
+            analysis_summary = _load_json_field(task.get("analysis_summary"), {})
+            test_generation_data = _load_json_field(task.get("test_generation_data"), {})
+            coverage_results_data = _load_json_field(task.get("coverage_results_data"), {})
             
             # Try to reconstruct basic results from MongoDB data
             results = {
@@ -201,70 +261,24 @@ async def get_analysis_results(task_id: str):
             }
             
             # If we have analysis_summary, try to extract more details
-            if analysis_summary and isinstance(analysis_summary, dict):
-                results["summary"].update(analysis_summary)
-            
-            # Try to extract test generation data from the original results if available
-            if task_info.get("results"):
-                original_results = task_info["results"]
-                if "test_generation" in original_results:
-                    results["test_files"] = original_results["test_generation"]
-                if "coverage_results" in original_results:
-                    results["coverage_report"] = original_results["coverage_results"]
-            
-            # If we still don't have test_files, try to reconstruct from stored test_generation_data
-            if not results["test_files"] and task.get("test_generation_data"):
-                try:
-                    test_generation_data = json.loads(task["test_generation_data"])
-                    results["test_files"] = test_generation_data
-                    logger.info(f"Reconstructed test_files from stored data for task {task_id}")
-                except Exception as e:
-                    logger.warning(f"Failed to parse test_generation_data for task {task_id}: {e}")
-            
-            # If we still don't have coverage_report, try to reconstruct from stored coverage_results_data
-            if not results["coverage_report"] and task.get("coverage_results_data"):
-                try:
-                    coverage_results_data = json.loads(task["coverage_results_data"])
-                    results["coverage_report"] = coverage_results_data
-                    logger.info(f"Reconstructed coverage_report from stored data for task {task_id}")
-                except Exception as e:
-                    logger.warning(f"Failed to parse coverage_results_data for task {task_id}: {e}")
+            results["summary"].update(analysis_summary)
             
             # Update summary with actual data from stored results
+            test_file_values = [v for v in results["test_files"].values() if isinstance(v, dict)]
             if results["test_files"]:
-                total_tests = 0
-                files_generated = 0
-                for lang, lang_data in results["test_files"].items():
-                    if isinstance(lang_data, dict):
-                        total_tests += lang_data.get("generated_tests", 0)
-                        files_generated += len(lang_data.get("files", []))
-                
-                if results.get("summary"):
-                    results["summary"]["total_tests_generated"] = total_tests
-                    results["summary"]["files_generated"] = files_generated
+                results["summary"].update(
+                    total_tests_generated=sum(v.get("generated_tests", 0) for v in test_file_values),
+                    files_generated=sum(len(v.get("files", [])) for v in test_file_values)
+                )
             
-            if results["coverage_report"]:
-                total_coverage = 0
-                total_passed = 0
-                total_failed = 0
-                total_tests = 0
-                coverage_count = 0
-                
-                for lang, lang_data in results["coverage_report"].items():
-                    if isinstance(lang_data, dict):
-                        total_coverage += lang_data.get("coverage_percentage", 0)
-                        total_passed += lang_data.get("tests_passed", 0)
-                        total_failed += lang_data.get("tests_failed", 0)
-                        total_tests += lang_data.get("total_tests", 0)
-                        coverage_count += 1
-                
-                if coverage_count > 0:
-                    avg_coverage = total_coverage / coverage_count
-                    if results.get("summary"):
-                        results["summary"]["overall_coverage"] = avg_coverage
-                        results["summary"]["tests_passed"] = total_passed
-                        results["summary"]["tests_failed"] = total_failed
-                        results["summary"]["total_tests"] = total_tests
+            coverage_values = [v for v in results["coverage_report"].values() if isinstance(v, dict)]
+            if coverage_values:
+                results["summary"].update(
+                    overall_coverage=sum(v.get("coverage_percentage", 0) for v in coverage_values) / len(coverage_values),
+                    tests_passed=sum(v.get("tests_passed", 0) for v in coverage_values),
+                    tests_failed=sum(v.get("tests_failed", 0) for v in coverage_values),
+                    total_tests=sum(v.get("total_tests", 0) for v in coverage_values)
+                )
         
         if not results:
             # Create minimal results if nothing is available
@@ -293,7 +307,7 @@ async def get_analysis_results(task_id: str):
                 analyzed_files=results.get("summary", {}).get("total_files", 0),
                 generated_tests=results.get("summary", {}).get("total_tests_generated", 0),
                 coverage_percentage=results.get("summary", {}).get("overall_coverage", 0),
-                analysis_summary=json.dumps(results.get("summary", {})) if isinstance(results.get("summary"), dict) else str(results.get("summary", "")),
+                analysis_summary=orjson.dumps(results.get("summary", {})).decode() if isinstance(results.get("summary"), dict) else str(results.get("summary", "")),
                 test_files=results.get("test_files", {}),
                 coverage_report=results.get("coverage_report", {}),
                 test_files_download_url=f"/api/download/{task_id}/tests",
@@ -335,23 +349,29 @@ async def download_test_files(task_id: str):
     
     try:
         # Get task from MongoDB
-        task = AnalysisTaskManager.get_task(task_id)
+        task = await AnalysisTaskManager.get_task(task_id, TASK_DOWNLOAD_PROJECTION)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         
         if task["status"] != "completed":
             raise HTTPException(status_code=400, detail="Task not completed yet")
         
-        # Create ZIP file with test files
-        zip_path = create_test_files_archive(task_id)
-        
-        if not zip_path.exists():
-            raise HTTPException(status_code=404, detail="Test files not found")
+        # Completed tasks are immutable, so reuse a previously built archive
+        zip_path = Path(task.get("test_files_path") or _archive_path("test_files", task_id))
+        if zip_path.exists():
+            if not task.get("test_files_path"):
+                await AnalysisTaskManager.update_task(task_id, {"test_files_path": str(zip_path)})
+            return FileResponse(
+                path=zip_path,
+                filename=f"test_files_{task_id}.zip",
+                media_type="application/zip"
+            )
         
-        return FileResponse(
-            path=zip_path,
-            filename=f"test_files_{task_id}.zip",
-            media_type="application/zip"
+        # Stream a fresh ZIP of the test files while it is built (a copy is cached for later downloads)
+        return StreamingResponse(
+            create_test_files_archive(task_id),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="test_files_{task_id}.zip"'}
         )
         
     except HTTPException:
@@ -366,23 +386,29 @@ async def download_coverage_report(task_id: str):
     
     try:
         # Get task from MongoDB
-        task = AnalysisTaskManager.get_task(task_id)
+        task = await AnalysisTaskManager.get_task(task_id, TASK_DOWNLOAD_PROJECTION)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         
         if task["status"] != "completed":
             raise HTTPException(status_code=400, detail="Task not completed yet")
         
-        # Create ZIP file with coverage reports
-        zip_path = create_coverage_archive(task_id)
-        
-        if not zip_path.exists():
-            raise HTTPException(status_code=404, detail="Coverage report not found")
+        # Completed tasks are immutable, so reuse a previously built archive
+        zip_path = Path(task.get("coverage_report_path") or _archive_path("coverage_report", task_id))
+        if zip_path.exists():
+            if not task.get("coverage_report_path"):
+                await AnalysisTaskManager.update_task(task_id, {"coverage_report_path": str(zip_path)})
+            return FileResponse(
+                path=zip_path,
+                filename=f"coverage_report_{task_id}.zip",
+                media_type="application/zip"
+            )
         
-        return FileResponse(
-            path=zip_path,
-            filename=f"coverage_report_{task_id}.zip",
-            media_type="application/zip"
+        # Stream a fresh ZIP of the coverage reports while it is built (a copy is cached for later downloads)
+        return StreamingResponse(
+            create_coverage_archive(task_id),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="coverage_report_{task_id}.zip"'}
         )
         
     except HTTPException:
@@ -409,16 +435,27 @@ async def run_analysis_task_internal(task_id: str, repo_url: str, api_key: str)
     
     test_generator = TestGeneratorService(final_api_key)
     
-    # Progress callback function
-    def progress_callback(progress: int, step: str):
-        active_tasks[task_id]["progress"] = progress
-        active_tasks[task_id]["current_step"] = step
-        
-        # Update MongoDB
-        AnalysisTaskManager.update_task(task_id, {
-            "progress_percentage": progress,
-            "current_step": step
-        })
+    # Progress callback function (MongoDB writes are debounced, the task cache is always updated)
+    last_written_progress = -PROGRESS_WRITE_MIN_DELTA
+    last_written_ts = 0.0
+    
+    async def progress_callback(progress: int, step: str):
+        nonlocal last_written_progress, last_written_ts
+        await task_cache.update_task(task_id, {"progress": progress, "current_step": step})
+        
+        now = time.monotonic()
+        if (
+            progress >= 100
+            or progress - last_written_progress >= PROGRESS_WRITE_MIN_DELTA
+            or now - last_written_ts > PROGRESS_WRITE_MIN_INTERVAL
+        ):
+            # Update MongoDB
+            await AnalysisTaskManager.update_task(task_id, {
+                "progress_percentage": progress,
+                "current_step": step
+            })
+            last_written_progress = progress
+            last_written_ts = now
     
     # Run the analysis
     results = await test_generator.generate_tests_for_repository(
@@ -431,146 +468,182 @@ async def run_analysis_task_internal(task_id: str, repo_url: str, api_key: str)
     task_update_data = {
         "status": "completed",
         "completed_at": datetime.utcnow(),
-        "detected_languages": json.dumps(list(results.get("repository_analysis", {}).get("languages", {}).keys())),
+        "detected_languages": orjson.dumps(list(results.get("repository_analysis", {}).get("languages", {}).keys())).decode(),
         "total_files": results.get("summary", {}).get("total_files", 0),
         "analyzed_files": results.get("summary", {}).get("total_files", 0),
         "generated_tests": results.get("summary", {}).get("total_tests_generated", 0),
         "coverage_percentage": results.get("summary", {}).get("overall_coverage", 0),
-        "analysis_summary": json.dumps(results.get("summary", {})),
-        "test_generation_data": json.dumps(results.get("test_generation", {})),
-        "coverage_results_data": json.dumps(results.get("coverage_results", {}))
+        "analysis_summary": orjson.dumps(results.get("summary", {})).decode(),
+        "test_generation_data": results.get("test_generation", {}),
+        "coverage_results_data": results.get("coverage_results", {})
     }
     
-    AnalysisTaskManager.update_task(task_id, task_update_data)
+    await AnalysisTaskManager.update_task(task_id, task_update_data)
     
     return results
 
 async def run_analysis_task(task_id: str, repo_url: str, api_key: str):
     """Background task to run the analysis"""
     
-    try:
-        # Update task status
-        AnalysisTaskManager.update_task(task_id, {
-            "status": "running",
-            "started_at": datetime.utcnow()
-        })
+    # Wait for a free analysis slot (bounded by max_concurrent_analyses)
+    analysis_semaphore = _get_analysis_semaphore()
+    if analysis_semaphore.locked():
+        logger.info(f"Analysis task {task_id} queued, waiting for a free slot")
+        await task_cache.update_task(task_id, {"current_step": "Waiting for a free analysis slot..."})
+    
+    async with analysis_semaphore:
+        try:
+            # Update task status
+            await AnalysisTaskManager.update_task(task_id, {
+                "status": "running",
+                "started_at": datetime.utcnow()
+            })
         
-        active_tasks[task_id]["status"] = "running"
-        active_tasks[task_id]["started_at"] = datetime.utcnow()
+            await task_cache.update_task(task_id, {
+                "status": "running",
+                "started_at": datetime.utcnow()
+            })
         
-        # Progress callback function
-        def progress_callback(progress: int, step: str):
-            active_tasks[task_id]["progress"] = progress
-            active_tasks[task_id]["current_step"] = step
-            
-            # Update MongoDB
-            AnalysisTaskManager.update_task(task_id, {
-                "progress_percentage": progress,
-                "current_step": step
+            # Run the analysis task with timeout (MAX_ANALYSIS_TIME for the entire analysis)
+            max_analysis_time = get_settings().max_analysis_time
+            try:
+                results = await asyncio.wait_for(
+                    run_analysis_task_internal(task_id, repo_url, api_key),
+                    timeout=max_analysis_time
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Analysis task {task_id} timed out after {max_analysis_time} seconds")
+                # Update task status to failed
+                await AnalysisTaskManager.update_task(task_id, {
+                    "status": "failed",
+                    "completed_at": datetime.utcnow(),
+                    "error_message": f"Analysis timed out after {max_analysis_time} seconds"
+                })
+                raise HTTPException(status_code=408, detail=f"Analysis timed out after {max_analysis_time} seconds")
+        
+            # Store results in the task cache for immediate access
+            await task_cache.set_task(task_id, results)
+        
+            # Update task status to completed
+            await AnalysisTaskManager.update_task(task_id, {
+                "status": "completed",
+                "completed_at": datetime.utcnow()
             })
         
-        # Run the analysis task with timeout
-        try:
-            results = await asyncio.wait_for(
-                run_analysis_task_internal(task_id, repo_url, api_key),
-                timeout=300  # 5 minutes timeout for entire analysis
-            )
-        except asyncio.TimeoutError:
-            logger.error(f"Analysis task {task_id} timed out after 5 minutes")
+            logger.info(f"Analysis task {task_id} completed successfully")
+        
+            return {"task_id": task_id, "status": "completed"}
+        
+        except Exception as e:
+            logger.error(f"Error in analysis task {task_id}: {e}")
             # Update task status to failed
-            AnalysisTaskManager.update_task(task_id, {
+            await AnalysisTaskManager.update_task(task_id, {
                 "status": "failed",
                 "completed_at": datetime.utcnow(),
-                "error_message": "Analysis timed out after 5 minutes"
+                "error_message": str(e)
             })
-            raise HTTPException(status_code=408, detail="Analysis timed out after 5 minutes")
-        
-        # Store results in active_tasks for immediate access
-        active_tasks[task_id] = results
-        
-        # Update task status to completed
-        AnalysisTaskManager.update_task(task_id, {
-            "status": "completed",
-            "completed_at": datetime.utcnow()
-        })
-        
-        logger.info(f"Analysis task {task_id} completed successfully")
-        
-        return {"task_id": task_id, "status": "completed"}
-        
-    except Exception as e:
-        logger.error(f"Error in analysis task {task_id}: {e}")
-        # Update task status to failed
-        AnalysisTaskManager.update_task(task_id, {
-            "status": "failed",
-            "completed_at": datetime.utcnow(),
-            "error_message": str(e)
-        })
-        raise
+            raise
 
-def create_test_files_archive(task_id: str) -> Path:
-    """Create a ZIP archive of test files"""
-    import zipfile
+class _ZipStreamBuffer:
+    """Write-only sink collecting ZIP output so it can be yielded in chunks"""
     
-    try:
-        # Create downloads directory
-        downloads_dir = get_settings().downloads_dir
-        downloads_dir.mkdir(exist_ok=True)
-        
-        # Create ZIP file
-        zip_path = downloads_dir / f"test_files_{task_id}.zip"
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add test files from temp directory
-            temp_dir = get_settings().temp_dir / task_id
-            if temp_dir.exists():
-                for file_path in temp_dir.rglob("*.py"):
-                    if "test" in file_path.name.lower():
-                        zipf.write(file_path, file_path.relative_to(temp_dir))
-                
-                for file_path in temp_dir.rglob("*.js"):
-                    if "test" in file_path.name.lower():
-                        zipf.write(file_path, file_path.relative_to(temp_dir))
-                
-                for file_path in temp_dir.rglob("*.java"):
-                    if "Test" in file_path.name:
-                        zipf.write(file_path, file_path.relative_to(temp_dir))
-        
-        return zip_path
-        
-    except Exception as e:
-        logger.error(f"Error creating test files archive: {e}")
-        raise
-
-def create_coverage_archive(task_id: str) -> Path:
-    """Create a ZIP archive of coverage reports"""
-    import zipfile
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
     
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _archive_path(kind: str, task_id: str) -> Path:
+    """Location of the cached ZIP archive for a task"""
+    _init_archive_dirs()
+    return _downloads_dir / f"{kind}_{task_id}.zip"
+
+def _stream_zip_archive(
+    zip_path: Path,
+    files: Iterator[Tuple[str, str]],
+    compresslevel: Optional[int] = None
+) -> Iterator[bytes]:
+    """Yield a ZIP archive as it is built, caching a copy at zip_path once complete"""
+    buffer = _ZipStreamBuffer()
+    part_path = zip_path.with_name(f"{zip_path.name}.{uuid.uuid4().hex}.part")
+    completed = False
     try:
-        # Create downloads directory
-        downloads_dir = get_settings().downloads_dir
-        downloads_dir.mkdir(exist_ok=True)
-        
-        # Create ZIP file
-        zip_path = downloads_dir / f"coverage_report_{task_id}.zip"
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add coverage reports from temp directory
-            temp_dir = get_settings().temp_dir / task_id
-            if temp_dir.exists():
-                # Add HTML coverage reports
-                for coverage_dir in temp_dir.rglob("htmlcov"):
-                    for file_path in coverage_dir.rglob("*"):
-                        if file_path.is_file():
-                            zipf.write(file_path, file_path.relative_to(temp_dir))
-                
-                # Add other coverage files
-                for file_path in temp_dir.rglob("coverage*"):
-                    if file_path.is_file():
-                        zipf.write(file_path, file_path.relative_to(temp_dir))
-        
-        return zip_path
-        
-    except Exception as e:
-        logger.error(f"Error creating coverage archive: {e}")
-        raise
+        with open(part_path, "wb") as cache_file:
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
+                for file_path, arcname in files:
+                    zipf.write(file_path, arcname)
+                    chunk = buffer.drain()
+                    cache_file.write(chunk)
+                    yield chunk
+            # Central directory is written when the archive is closed
+            chunk = buffer.drain()
+            cache_file.write(chunk)
+            yield chunk
+        os.replace(part_path, zip_path)
+        completed = True
+    finally:
+        if not completed:
+            part_path.unlink(missing_ok=True)
+
+def _walk_files(root: Path) -> Iterator[os.DirEntry]:
+    """Yield file entries under root (scandir caches d_type, so no per-entry stat)"""
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    yield entry
+
+def _iter_test_files(temp_dir: Path) -> Iterator[Tuple[str, str]]:
+    """Yield (file path, archive name) for generated test files"""
+    if not temp_dir.exists():
+        return
+    # Single walk, dispatching on suffix
+    for entry in _walk_files(temp_dir):
+        name = entry.name
+        lower_name = name.lower()
+        if (
+            (name.endswith(".py") and "test" in lower_name)
+            or (name.endswith((".js", ".ts", ".jsx", ".tsx")) and "test" in lower_name)
+            or (name.endswith(".java") and "Test" in name)
+        ):
+            yield entry.path, os.path.relpath(entry.path, temp_dir)
+
+def _iter_coverage_files(temp_dir: Path) -> Iterator[Tuple[str, str]]:
+    """Yield (file path, archive name) for coverage reports"""
+    if not temp_dir.exists():
+        return
+    # Single walk: everything under htmlcov/ plus other coverage* files (each file visited once)
+    for entry in _walk_files(temp_dir):
+        arcname = os.path.relpath(entry.path, temp_dir)
+        if entry.name.startswith("coverage") or "htmlcov" in arcname.split(os.sep)[:-1]:
+            yield entry.path, arcname
+
+def create_test_files_archive(task_id: str) -> Iterator[bytes]:
+    """Create a ZIP archive of test files, streamed as it is built"""
+    _init_archive_dirs()
+    return _stream_zip_archive(
+        _archive_path("test_files", task_id),
+        _iter_test_files(_temp_dir / task_id)
+    )
+
+def create_coverage_archive(task_id: str) -> Iterator[bytes]:
+    """Create a ZIP archive of coverage reports, streamed as it is built"""
+    _init_archive_dirs()
+    # Coverage HTML is many small files; fastest deflate level keeps CPU low
+    return _stream_zip_archive(
+        _archive_path("coverage_report", task_id),
+        _iter_coverage_files(_temp_dir / task_id),
+        compresslevel=1
+    )
@@ -0,0 +1,143 @@
+import json
+import time
+from typing import Optional, Dict, Any
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Live task state expires an hour after its last write
+TASK_STATE_TTL = 3600
+
+# Seconds to wait before trying Redis again after a failure
+REDIS_RETRY_DELAY = 30
+
+# Most tasks held by the in-process fallback store
+MAX_LOCAL_TASKS = 1000
+
+class RedisTaskCache:
+    """Cross-process store for live analysis task state backed by Redis hashes"""
+
+    def __init__(self, ttl: int = TASK_STATE_TTL):
+        self.ttl = ttl
+        self._redis: Optional[aioredis.Redis] = None
+        self._redis_retry_at = 0.0
+        # Process-local fallback used when Redis is not reachable
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._local_expiry: Dict[str, float] = {}
+
+    @staticmethod
+    def _key(task_id: str) -> str:
+        return f"task:{task_id}"
+
+    def _get_redis(self) -> Optional[aioredis.Redis]:
+        """Get Redis client instance with lazy initialization"""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(get_settings().redis_url)
+        return self._redis
+
+    def _disable_redis(self, error: Exception):
+        """Fall back to the in-process store until REDIS_RETRY_DELAY has passed"""
+        logger.warning(f"Redis unavailable, using in-process task state for {REDIS_RETRY_DELAY}s: {error}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_DELAY
+
+    def _expire_local(self, task_id: str):
+        if self._local_expiry.get(task_id, float("inf")) < time.monotonic():
+            self._local.pop(task_id, None)
+            self._local_expiry.pop(task_id, None)
+
+    def _pop_local(self, task_id: str) -> Dict[str, Any]:
+        self._expire_local(task_id)
+        self._local_expiry.pop(task_id, None)
+        return self._local.pop(task_id, {})
+
+    def _store_local(self, task_id: str, data: Dict[str, Any]):
+        """Store a task in the fallback store, keeping it in least recently written order"""
+        self._local.pop(task_id, None)
+        self._local_expiry.pop(task_id, None)
+        now = time.monotonic()
+        # Every write gets the same TTL, so the oldest entries are first; drop expired ones and any beyond the cap
+        while self._local:
+            oldest = next(iter(self._local))
+            if len(self._local) < MAX_LOCAL_TASKS and self._local_expiry[oldest] >= now:
+                break
+            del self._local[oldest]
+            del self._local_expiry[oldest]
+        self._local[task_id] = data
+        self._local_expiry[task_id] = now + self.ttl
+
+    async def set_task(self, task_id: str, data: Dict[str, Any]):
+        """Replace the state of a task"""
+        client = self._get_redis()
+        if client is not None:
+            try:
+                key = self._key(task_id)
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.delete(key)
+                    if data:
+                        pipe.hset(key, mapping={k: json.dumps(v, default=str) for k, v in data.items()})
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                self._pop_local(task_id)
+                return
+            except (RedisError, OSError) as e:
+                self._disable_redis(e)
+
+        self._store_local(task_id, dict(data))
+
+    async def update_task(self, task_id: str, data: Dict[str, Any]):
+        """Update selected fields of a task's state"""
+        client = self._get_redis()
+        if client is not None:
+            try:
+                key = self._key(task_id)
+                # State written to the fallback store while Redis was down moves back with this update
+                self._expire_local(task_id)
+                merged = {**self._local.get(task_id, {}), **data}
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.hset(key, mapping={k: json.dumps(v, default=str) for k, v in merged.items()})
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                self._pop_local(task_id)
+                return
+            except (RedisError, OSError) as e:
+                self._disable_redis(e)
+
+        state = self._pop_local(task_id)
+        state.update(data)
+        self._store_local(task_id, state)
+
+    async def get_task(self, task_id: str) -> Dict[str, Any]:
+        """Get the state of a task, or an empty dict if unknown"""
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.hgetall(self._key(task_id))
+                if raw:
+                    return {k.decode(): json.loads(v) for k, v in raw.items()}
+            except (RedisError, OSError) as e:
+                self._disable_redis(e)
+
+        self._expire_local(task_id)
+        return dict(self._local.get(task_id, {}))
+
+    async def close(self):
+        """Close Redis connection"""
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+                logger.info("Redis connection closed")
+            except Exception as e:
+                logger.warning(f"Error closing Redis connection: {e}")
+            self._redis = None
+
+# Shared task state store
+task_cache = RedisTaskCache()
+
+async def close_cache():
+    """Close the task state store"""
+    await task_cache.close()
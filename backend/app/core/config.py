@@ -1,7 +1,74 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Optional, Mapping, Any
+from types import MappingProxyType
 from pathlib import Path
+from functools import lru_cache
+
+# Supported Languages and Frameworks (static lookup tables, built once at import)
+SUPPORTED_LANGUAGES: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "python": MappingProxyType({
+        "framework": "pytest",
+        "coverage_tool": "pytest-cov",
+        "file_extensions": (".py",),
+        "test_pattern": "test_*.py",
+        "config_files": ("pytest.ini", "pyproject.toml", "setup.cfg")
+    }),
+    "javascript": MappingProxyType({
+        "framework": "jest",
+        "coverage_tool": "jest",
+        "file_extensions": (".js", ".ts", ".jsx", ".tsx"),
+        "test_pattern": "*.test.js",
+        "config_files": ("package.json", "jest.config.js")
+    }),
+    "java": MappingProxyType({
+        "framework": "junit5",
+        "coverage_tool": "jacoco",
+        "file_extensions": (".java",),
+        "test_pattern": "*Test.java",
+        "config_files": ("pom.xml", "build.gradle")
+    }),
+    "csharp": MappingProxyType({
+        "framework": "xunit",
+        "coverage_tool": "coverlet",
+        "file_extensions": (".cs",),
+        "test_pattern": "*Tests.cs",
+        "config_files": ("*.csproj", "*.sln")
+    }),
+    "go": MappingProxyType({
+        "framework": "go_testing",
+        "coverage_tool": "go",
+        "file_extensions": (".go",),
+        "test_pattern": "*_test.go",
+        "config_files": ("go.mod", "go.sum")
+    }),
+    "ruby": MappingProxyType({
+        "framework": "rspec",
+        "coverage_tool": "simplecov",
+        "file_extensions": (".rb",),
+        "test_pattern": "*_spec.rb",
+        "config_files": ("Gemfile", "Rakefile")
+    }),
+    "php": MappingProxyType({
+        "framework": "phpunit",
+        "coverage_tool": "phpunit",
+        "file_extensions": (".php",),
+        "test_pattern": "*Test.php",
+        "config_files": ("composer.json", "phpunit.xml")
+    })
+})
+
+# Reverse index: file extension -> language
+EXT_TO_LANG: Mapping[str, str] = MappingProxyType({
+    ext: language
+    for language, config in SUPPORTED_LANGUAGES.items()
+    for ext in config["file_extensions"]
+})
+
+# Test framework per language
+LANGUAGE_FRAMEWORKS: Mapping[str, str] = MappingProxyType({
+    language: config["framework"] for language, config in SUPPORTED_LANGUAGES.items()
+})
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -27,9 +94,19 @@ class Settings(BaseSettings):
     # MongoDB Configuration
     mongodb_url: str = Field(default="mongodb://localhost:27017", alias="MONGODB_URL")
     mongodb_database: str = Field(default="ai_testing_agent", alias="MONGODB_DATABASE")
+    mongodb_max_pool_size: int = Field(default=200, alias="MONGODB_MAX_POOL_SIZE")
+    mongodb_min_pool_size: int = Field(default=10, alias="MONGODB_MIN_POOL_SIZE")
+    mongodb_max_idle_time_ms: int = Field(default=300000, alias="MONGODB_MAX_IDLE_TIME_MS")
+    mongodb_wait_queue_timeout_ms: int = Field(default=5000, alias="MONGODB_WAIT_QUEUE_TIMEOUT_MS")
+    mongodb_compressors: str = Field(default="", alias="MONGODB_COMPRESSORS")  # off by default; e.g. zstd,snappy,zlib
     
     # Redis
     redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    use_task_queue: bool = Field(default=False, alias="USE_TASK_QUEUE")  # run analyses on the Arq worker
+    
+    # Cached bare clones (temp/_repo_cache), evicted least recently used first
+    repo_cache_max_entries: int = Field(default=32, alias="REPO_CACHE_MAX_ENTRIES")
+    repo_cache_max_age: int = Field(default=7 * 24 * 3600, alias="REPO_CACHE_MAX_AGE")  # seconds since last use
     
     # Logging
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
@@ -53,59 +130,12 @@ class Settings(BaseSettings):
     max_tokens_per_request: int = Field(default=8000, alias="MAX_TOKENS_PER_REQUEST")
     max_input_tokens: int = Field(default=128000, alias="MAX_INPUT_TOKENS")
     temperature: float = Field(default=0.1, alias="TEMPERATURE")
+    ai_concurrency: int = Field(default=8, alias="AI_CONCURRENCY")  # in-flight AI requests per analysis
     
-    # Supported Languages and Frameworks
-    supported_languages: dict = {
-        "python": {
-            "framework": "pytest",
-            "coverage_tool": "pytest-cov",
-            "file_extensions": [".py"],
-            "test_pattern": "test_*.py",
-            "config_files": ["pytest.ini", "pyproject.toml", "setup.cfg"]
-        },
-        "javascript": {
-            "framework": "jest",
-            "coverage_tool": "jest",
-            "file_extensions": [".js", ".ts", ".jsx", ".tsx"],
-            "test_pattern": "*.test.js",
-            "config_files": ["package.json", "jest.config.js"]
-        },
-        "java": {
-            "framework": "junit5",
-            "coverage_tool": "jacoco",
-            "file_extensions": [".java"],
-            "test_pattern": "*Test.java",
-            "config_files": ["pom.xml", "build.gradle"]
-        },
-        "csharp": {
-            "framework": "xunit",
-            "coverage_tool": "coverlet",
-            "file_extensions": [".cs"],
-            "test_pattern": "*Tests.cs",
-            "config_files": ["*.csproj", "*.sln"]
-        },
-        "go": {
-            "framework": "go_testing",
-            "coverage_tool": "go",
-            "file_extensions": [".go"],
-            "test_pattern": "*_test.go",
-            "config_files": ["go.mod", "go.sum"]
-        },
-        "ruby": {
-            "framework": "rspec",
-            "coverage_tool": "simplecov",
-            "file_extensions": [".rb"],
-            "test_pattern": "*_spec.rb",
-            "config_files": ["Gemfile", "Rakefile"]
-        },
-        "php": {
-            "framework": "phpunit",
-            "coverage_tool": "phpunit",
-            "file_extensions": [".php"],
-            "test_pattern": "*Test.php",
-            "config_files": ["composer.json", "phpunit.xml"]
-        }
-    }
+    # Supported Languages and Frameworks (static, see SUPPORTED_LANGUAGES)
+    @property
+    def supported_languages(self) -> Mapping[str, Mapping[str, Any]]:
+        return SUPPORTED_LANGUAGES
     
     model_config = {
         "env_file": ".env",
@@ -113,17 +143,14 @@ class Settings(BaseSettings):
         "extra": "ignore"  # Allow extra fields during migration
     }
 
-# Create settings instance (lazy initialization)
-_settings = None
-
+# Create settings instance (lazy initialization, cached for the process)
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    global _settings
-    if _settings is None:
-        _settings = Settings()
-        # Ensure directories exist
-        _settings.downloads_dir.mkdir(exist_ok=True)
-        _settings.temp_dir.mkdir(exist_ok=True)
-        _settings.logs_dir.mkdir(exist_ok=True)
+    _settings = Settings()
+    # Ensure directories exist
+    _settings.downloads_dir.mkdir(exist_ok=True)
+    _settings.temp_dir.mkdir(exist_ok=True)
+    _settings.logs_dir.mkdir(exist_ok=True)
     return _settings
 
 # For backward compatibility - will be initialized when first accessed
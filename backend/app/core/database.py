@@ -1,72 +1,95 @@
-from pymongo import MongoClient
-from pymongo.database import Database
-from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, ReadPreference, UpdateOne
+from pymongo.read_concern import ReadConcern
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
 from app.core.config import get_settings
 from app.core.logging import get_logger
-import json
+import orjson
 
 logger = get_logger(__name__)
 
-# Global variables for MongoDB connection
-_client: Optional[MongoClient] = None
-_database: Optional[Database] = None
-_connection_initialized = False
+@lru_cache(maxsize=1)
+def _build_client() -> AsyncIOMotorClient:
+    """Create the shared MongoDB client exactly once"""
+    settings = get_settings()
+    # Wire compression costs CPU on every query, so it is only enabled when configured
+    compression = {"compressors": settings.mongodb_compressors} if settings.mongodb_compressors else {}
+    try:
+        # Create new connection with proper settings (Motor connects lazily)
+        return AsyncIOMotorClient(
+            settings.mongodb_url,
+            serverSelectionTimeoutMS=10000,  # 10 second timeout
+            connectTimeoutMS=10000,
+            socketTimeoutMS=10000,
+            maxPoolSize=settings.mongodb_max_pool_size,
+            minPoolSize=settings.mongodb_min_pool_size,
+            maxIdleTimeMS=settings.mongodb_max_idle_time_ms,
+            waitQueueTimeoutMS=settings.mongodb_wait_queue_timeout_ms,
+            retryWrites=True,
+            retryReads=True,
+            **compression
+        )
+    except Exception as e:
+        logger.error(f"Failed to create MongoDB client: {e}")
+        raise
 
-def get_client() -> MongoClient:
+def get_client() -> AsyncIOMotorClient:
     """Get MongoDB client instance with lazy initialization"""
-    global _client, _connection_initialized
-    if _client is None or not _connection_initialized:
-        settings = get_settings()
-        try:
-            # Close existing connection if any
-            if _client:
-                try:
-                    _client.close()
-                except Exception:
-                    pass  # Ignore close errors
-            
-            # Create new connection with proper settings
-            _client = MongoClient(
-                settings.mongodb_url,
-                serverSelectionTimeoutMS=10000,  # 10 second timeout
-                connectTimeoutMS=10000,
-                socketTimeoutMS=10000,
-                maxPoolSize=20,
-                minPoolSize=5,
-                maxIdleTimeMS=30000,
-                retryWrites=True,
-                retryReads=True
-            )
-            
-            # Test the connection
-            _client.admin.command('ping')
-            _connection_initialized = True
-            logger.info(f"Connected to MongoDB at {settings.mongodb_url}")
-        except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
-            _client = None
-            _connection_initialized = False
-            raise
-    return _client
+    return _build_client()
 
-def get_database() -> Database:
+@lru_cache(maxsize=1)
+def get_database() -> AsyncIOMotorDatabase:
     """Get MongoDB database instance"""
-    global _database
-    if _database is None:
-        settings = get_settings()
-        _database = get_client()[settings.mongodb_database]
-        logger.info(f"Using database: {settings.mongodb_database}")
-    return _database
+    settings = get_settings()
+    logger.info(f"Using database: {settings.mongodb_database}")
+    return get_client()[settings.mongodb_database]
+
+@lru_cache(maxsize=1)
+def get_read_database() -> AsyncIOMotorDatabase:
+    """Get a MongoDB database handle that prefers secondaries for staleness-tolerant reads"""
+    return get_client().get_database(
+        get_settings().mongodb_database,
+        read_preference=ReadPreference.SECONDARY_PREFERRED,
+        read_concern=ReadConcern("local")
+    )
 
-def get_collection(collection_name: str) -> Collection:
-    """Get MongoDB collection instance"""
-    return get_database()[collection_name]
+@lru_cache(maxsize=16)
+def get_collection(collection_name: str, read: bool = False) -> AsyncIOMotorCollection:
+    """Get MongoDB collection instance, read=True routes to secondaries when a replica set is used"""
+    return (get_read_database() if read else get_database())[collection_name]
 
 # Collection names
 ANALYSIS_TASKS_COLLECTION = "analysis_tasks"
 MODEL_USAGE_COLLECTION = "model_usage"
+USAGE_STATS_COLLECTION = "usage_stats"
+
+# Running usage totals live in a single document, keyed by the record field they sum
+USAGE_TOTALS_ID = "totals"
+USAGE_TOTAL_FIELDS = {"requests_made": "total_requests", "tokens_used": "total_tokens", "cost": "total_cost"}
+
+# Number of documents fetched per round trip by the streaming readers
+CURSOR_BATCH_SIZE = 200
+
+# Counter fields of a usage record
+USAGE_TOTALS_PROJECTION = {"_id": 0, "requests_made": 1, "tokens_used": 1, "cost": 1}
+
+# Number of updates sent per bulk_write during data migration
+MIGRATION_BATCH_SIZE = 1000
+# Number of documents fetched per cursor round trip during data migration
+MIGRATION_CURSOR_BATCH_SIZE = 500
+
+def _dump_json(value: Any) -> str:
+    """Encode a legacy sub-document field as a JSON string"""
+    return orjson.dumps(value).decode()
+
+def _parse_json_object(value: str) -> Dict[str, Any]:
+    """Decode a legacy JSON string field, falling back to an empty dict"""
+    try:
+        return orjson.loads(value)
+    except (TypeError, orjson.JSONDecodeError):
+        return {}
 
 class MongoDBManager:
     """Manager class for MongoDB operations"""
@@ -75,45 +98,89 @@ class MongoDBManager:
     async def init_db():
         """Initialize database and create indexes"""
         try:
+            # Test the connection
+            await get_client().admin.command('ping')
+            logger.info(f"Connected to MongoDB at {get_settings().mongodb_url}")
+            
             db = get_database()
             
             # Create indexes for analysis_tasks collection
             analysis_tasks = db[ANALYSIS_TASKS_COLLECTION]
-            analysis_tasks.create_index("id", unique=True)
-            analysis_tasks.create_index("status")
-            analysis_tasks.create_index("created_at")
+            await analysis_tasks.create_index([("id", ASCENDING)], unique=True)
+            # Status lookups are served newest first and the status-filtered migration backfill shares the prefix
+            await analysis_tasks.create_index([("status", ASCENDING), ("created_at", DESCENDING)])
+            await analysis_tasks.create_index("created_at")
             
             # Create indexes for model_usage collection
             model_usage = db[MODEL_USAGE_COLLECTION]
-            model_usage.create_index("task_id")
-            model_usage.create_index("created_at")
+            await model_usage.create_index("task_id")
+            await model_usage.create_index("created_at")
             
             logger.info("MongoDB initialized successfully with indexes")
             
+            # Every endpoint looks tasks up by id, make sure that is an index scan
+            await MongoDBManager.verify_task_lookup_index()
+            
             # Run data migration for existing data
             await MongoDBManager.migrate_existing_data()
+            await ModelUsageManager.backfill_totals()
             
         except Exception as e:
             logger.error(f"MongoDB initialization failed: {e}")
             raise
     
+    @staticmethod
+    async def verify_task_lookup_index():
+        """Warn if task lookups by id would not use an index"""
+        try:
+            collection = get_collection(ANALYSIS_TASKS_COLLECTION)
+            plan = await collection.find({"id": ""}).limit(1).explain()
+            winning_plan = plan.get("queryPlanner", {}).get("winningPlan", {})
+            if "IXSCAN" not in str(winning_plan) and "IDHACK" not in str(winning_plan):
+                logger.warning(f"Task lookups by id are not using an index: {winning_plan}")
+        except Exception as e:
+            logger.warning(f"Could not verify task lookup index: {e}")
+    
     @staticmethod
     async def close_connection():
         """Close MongoDB connection"""
-        global _client, _database, _connection_initialized
         try:
-            if _client:
-                _client.close()
+            if _build_client.cache_info().currsize:
+                get_client().close()
                 logger.info("MongoDB connection closed")
-            _client = None
-            _database = None
-            _connection_initialized = False
         except Exception as e:
             logger.warning(f"Error closing MongoDB connection: {e}")
+        finally:
             # Reset state even if close fails
-            _client = None
-            _database = None
-            _connection_initialized = False
+            _build_client.cache_clear()
+            get_database.cache_clear()
+            get_read_database.cache_clear()
+            get_collection.cache_clear()
+
+    @staticmethod
+    async def _bulk_migrate(collection: AsyncIOMotorCollection, field: str, bson_type: str,
+                            convert: Callable[[Any], Any]) -> int:
+        """Convert every value of field stored as bson_type, in unordered bulk batches"""
+        operations = []
+        count = 0
+        
+        # Only fetch the field being migrated, the $type filter already guarantees its type
+        cursor = collection.find(
+            {field: {"$type": bson_type}},
+            projection={field: 1},
+            batch_size=MIGRATION_CURSOR_BATCH_SIZE
+        )
+        async for doc in cursor:
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {field: convert(doc[field])}}))
+            if len(operations) >= MIGRATION_BATCH_SIZE:
+                result = await collection.bulk_write(operations, ordered=False)
+                count += result.modified_count
+                operations = []
+        
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            count += result.modified_count
+        return count
 
     @staticmethod
     async def migrate_existing_data():
@@ -121,68 +188,29 @@ class MongoDBManager:
         try:
             collection = get_collection(ANALYSIS_TASKS_COLLECTION)
             
-            # Find all documents with analysis_summary as dict
-            cursor = collection.find({"analysis_summary": {"$type": "object"}})
-            count = 0
-            
-            for doc in cursor:
-                if isinstance(doc.get("analysis_summary"), dict):
-                    # Convert dict to JSON string
-                    collection.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": {"analysis_summary": json.dumps(doc["analysis_summary"])}}
-                    )
-                    count += 1
-            
-            if count > 0:
-                logger.info(f"Migrated {count} documents with analysis_summary data type")
-            
-            # Find all documents with detected_languages as array
-            cursor = collection.find({"detected_languages": {"$type": "array"}})
-            count = 0
-            
-            for doc in cursor:
-                if isinstance(doc.get("detected_languages"), list):
-                    # Convert list to JSON string
-                    collection.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": {"detected_languages": json.dumps(doc["detected_languages"])}}
-                    )
-                    count += 1
-            
-            if count > 0:
-                logger.info(f"Migrated {count} documents with detected_languages data type")
+            # Convert analysis_summary sub-documents and detected_languages arrays to JSON strings
+            for field, bson_type in [("analysis_summary", "object"), ("detected_languages", "array")]:
+                count = await MongoDBManager._bulk_migrate(collection, field, bson_type, _dump_json)
+                if count > 0:
+                    logger.info(f"Migrated {count} documents with {field} data type")
             
             # Add missing test_generation_data and coverage_results_data fields for existing completed tasks
-            cursor = collection.find({
-                "status": "completed",
-                "$or": [
-                    {"test_generation_data": {"$exists": False}},
-                    {"coverage_results_data": {"$exists": False}}
-                ]
-            })
             count = 0
-            
-            for doc in cursor:
-                update_data = {}
-                
-                # Add test_generation_data if missing
-                if "test_generation_data" not in doc:
-                    update_data["test_generation_data"] = json.dumps({})
-                
-                # Add coverage_results_data if missing
-                if "coverage_results_data" not in doc:
-                    update_data["coverage_results_data"] = json.dumps({})
-                
-                if update_data:
-                    collection.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": update_data}
-                    )
-                    count += 1
+            for field in ["test_generation_data", "coverage_results_data"]:
+                result = await collection.update_many(
+                    {"status": "completed", field: {"$exists": False}},
+                    {"$set": {field: {}}}
+                )
+                count += result.modified_count
             
             if count > 0:
-                logger.info(f"Added missing fields to {count} existing completed tasks")
+                logger.info(f"Added {count} missing fields to existing completed tasks")
+            
+            # Convert test_generation_data / coverage_results_data JSON strings to sub-documents
+            for field in ["test_generation_data", "coverage_results_data"]:
+                count = await MongoDBManager._bulk_migrate(collection, field, "string", _parse_json_object)
+                if count > 0:
+                    logger.info(f"Migrated {count} documents with {field} data type")
                 
         except Exception as e:
             logger.error(f"Error during data migration: {e}")
@@ -193,39 +221,55 @@ class AnalysisTaskManager:
     """Manager for analysis task operations"""
     
     @staticmethod
-    def create_task(task_data: Dict[str, Any]) -> str:
+    async def create_task(task_data: Dict[str, Any]) -> str:
         """Create a new analysis task"""
         collection = get_collection(ANALYSIS_TASKS_COLLECTION)
-        result = collection.insert_one(task_data)
+        result = await collection.insert_one(task_data)
         return str(result.inserted_id)
     
     @staticmethod
-    def get_task(task_id: str) -> Optional[Dict[str, Any]]:
-        """Get a task by ID"""
+    async def create_tasks(tasks: List[Dict[str, Any]]) -> List[str]:
+        """Create several analysis tasks in one round trip"""
+        if not tasks:
+            return []
         collection = get_collection(ANALYSIS_TASKS_COLLECTION)
-        return collection.find_one({"id": task_id})
+        result = await collection.insert_many(tasks, ordered=False)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
     
     @staticmethod
-    def update_task(task_id: str, update_data: Dict[str, Any]) -> bool:
+    async def get_task(task_id: str, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Get a task by ID, optionally restricted to the projected fields"""
+        collection = get_collection(ANALYSIS_TASKS_COLLECTION)
+        return await collection.find_one({"id": task_id}, projection)
+    
+    @staticmethod
+    async def update_task(task_id: str, update_data: Dict[str, Any]) -> bool:
         """Update a task"""
         collection = get_collection(ANALYSIS_TASKS_COLLECTION)
-        result = collection.update_one(
+        result = await collection.update_one(
             {"id": task_id},
             {"$set": update_data}
         )
         return result.modified_count > 0
     
     @staticmethod
-    def get_tasks_by_status(status: str) -> list:
-        """Get tasks by status"""
-        collection = get_collection(ANALYSIS_TASKS_COLLECTION)
-        return list(collection.find({"status": status}))
+    async def iter_tasks_by_status(status: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream tasks by status, newest first, one cursor batch at a time"""
+        collection = get_collection(ANALYSIS_TASKS_COLLECTION, read=True)
+        cursor = collection.find({"status": status}, batch_size=CURSOR_BATCH_SIZE).sort("created_at", DESCENDING)
+        async for task in cursor:
+            yield task
     
     @staticmethod
-    def delete_task(task_id: str) -> bool:
+    async def get_tasks_by_status(status: str) -> list:
+        """Get tasks by status, newest first"""
+        return [task async for task in AnalysisTaskManager.iter_tasks_by_status(status)]
+    
+    @staticmethod
+    async def delete_task(task_id: str) -> bool:
         """Delete a task"""
         collection = get_collection(ANALYSIS_TASKS_COLLECTION)
-        result = collection.delete_one({"id": task_id})
+        result = await collection.delete_one({"id": task_id})
         return result.deleted_count > 0
 
 # MongoDB operations for model usage
@@ -233,34 +277,73 @@ class ModelUsageManager:
     """Manager for model usage operations"""
     
     @staticmethod
-    def create_usage_record(usage_data: Dict[str, Any]) -> str:
+    async def create_usage_record(usage_data: Dict[str, Any]) -> str:
         """Create a new model usage record"""
         collection = get_collection(MODEL_USAGE_COLLECTION)
-        result = collection.insert_one(usage_data)
+        result = await collection.insert_one(usage_data)
+        await ModelUsageManager._increment_totals([usage_data])
         return str(result.inserted_id)
     
     @staticmethod
-    def get_usage_by_task(task_id: str) -> list:
-        """Get usage records for a specific task"""
+    async def create_usage_records(records: List[Dict[str, Any]]) -> List[str]:
+        """Create several model usage records in one round trip"""
+        if not records:
+            return []
         collection = get_collection(MODEL_USAGE_COLLECTION)
-        return list(collection.find({"task_id": task_id}))
+        result = await collection.insert_many(records, ordered=False)
+        await ModelUsageManager._increment_totals(records)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    
+    @staticmethod
+    async def _increment_totals(records: List[Dict[str, Any]]):
+        """Add usage records to the precomputed totals document"""
+        increments = {
+            total_field: sum(record.get(field, 0) for record in records)
+            for field, total_field in USAGE_TOTAL_FIELDS.items()
+        }
+        await get_collection(USAGE_STATS_COLLECTION).update_one(
+            {"_id": USAGE_TOTALS_ID},
+            {"$inc": increments},
+            upsert=True
+        )
+    
+    @staticmethod
+    async def iter_usage_by_task(task_id: str, projection: Optional[Dict[str, int]] = USAGE_TOTALS_PROJECTION) -> AsyncIterator[Dict[str, Any]]:
+        """Stream usage records for a specific task, by default only their counters"""
+        collection = get_collection(MODEL_USAGE_COLLECTION, read=True)
+        async for record in collection.find({"task_id": task_id}, projection, batch_size=CURSOR_BATCH_SIZE):
+            yield record
+    
+    @staticmethod
+    async def get_usage_by_task(task_id: str) -> list:
+        """Get usage records for a specific task"""
+        return [record async for record in ModelUsageManager.iter_usage_by_task(task_id, projection=None)]
     
     @staticmethod
-    def get_total_usage() -> Dict[str, Any]:
+    async def get_total_usage() -> Dict[str, Any]:
         """Get total usage statistics"""
-        collection = get_collection(MODEL_USAGE_COLLECTION)
+        totals = await get_collection(USAGE_STATS_COLLECTION, read=True).find_one({"_id": USAGE_TOTALS_ID}, {"_id": 0})
+        return totals or {"total_requests": 0, "total_tokens": 0, "total_cost": 0}
+    
+    @staticmethod
+    async def backfill_totals():
+        """Seed the totals document from existing usage records if it does not exist yet"""
+        stats = get_collection(USAGE_STATS_COLLECTION)
+        if await stats.find_one({"_id": USAGE_TOTALS_ID}, {"_id": 1}) is not None:
+            return
+        
         pipeline = [
             {
                 "$group": {
                     "_id": None,
-                    "total_requests": {"$sum": "$requests_made"},
-                    "total_tokens": {"$sum": "$tokens_used"},
-                    "total_cost": {"$sum": "$cost"}
+                    **{total_field: {"$sum": f"${field}"} for field, total_field in USAGE_TOTAL_FIELDS.items()}
                 }
             }
         ]
-        result = list(collection.aggregate(pipeline))
-        return result[0] if result else {"total_requests": 0, "total_tokens": 0, "total_cost": 0}
+        result = await get_collection(MODEL_USAGE_COLLECTION).aggregate(pipeline).to_list(length=None)
+        totals = {total_field: result[0][total_field] if result else 0 for total_field in USAGE_TOTAL_FIELDS.values()}
+        await stats.update_one({"_id": USAGE_TOTALS_ID}, {"$setOnInsert": totals}, upsert=True)
+        logger.info(f"Initialized usage totals: {totals}")
 
 # Initialize database
 async def init_db():
@@ -1,11 +1,29 @@
+import copy
 import logging
 import logging.handlers
+import queue
 import sys
 from pathlib import Path
+from typing import Optional
 from app.core.config import get_settings
 
+# Background thread that writes queued log records to the real handlers
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the handlers on the listener thread"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() runs format() in the caller; only merge %-style args here,
+        # since they may be mutated once the call returns. Tracebacks are rendered later
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 def setup_logging():
     """Setup logging configuration"""
+    global _queue_listener
     
     # Get settings
     settings = get_settings()
@@ -19,11 +37,13 @@ def setup_logging():
     )
     
     # Create logger
+    log_level = getattr(logging, settings.log_level.upper())
     logger = logging.getLogger()
-    logger.setLevel(getattr(logging, settings.log_level.upper()))
+    logger.setLevel(log_level)
     
     # Clear existing handlers
     logger.handlers.clear()
+    stop_logging()
     
     # Console handler with UTF-8 encoding
     console_handler = logging.StreamHandler(sys.stdout)
@@ -32,7 +52,6 @@ def setup_logging():
     # Ensure UTF-8 encoding for console output
     if hasattr(console_handler.stream, 'reconfigure'):
         console_handler.stream.reconfigure(encoding='utf-8')
-    logger.addHandler(console_handler)
     
     # File handler with rotation and UTF-8 encoding
     file_handler = logging.handlers.RotatingFileHandler(
@@ -41,17 +60,32 @@ def setup_logging():
         backupCount=5,
         encoding='utf-8'  # Explicit UTF-8 encoding
     )
-    file_handler.setLevel(logging.DEBUG)
+    file_handler.setLevel(log_level)
     file_handler.setFormatter(log_format)
-    logger.addHandler(file_handler)
+    
+    # Callers only enqueue records, formatting and disk writes happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(DeferredFormatQueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("fastapi").setLevel(logging.INFO)
     logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("pymongo").setLevel(logging.WARNING)
     
     return logger
 
+def stop_logging():
+    """Flush queued log records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance with the given name"""
     return logging.getLogger(name)
@@ -0,0 +1,70 @@
+import base64
+import hashlib
+from typing import Optional
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from cryptography.fernet import Fernet, InvalidToken
+
+logger = get_logger(__name__)
+
+# Queue consumed by the analysis worker
+ANALYSIS_QUEUE = "analyze"
+
+# Per-task API keys handed to the worker are dropped if the job has not started by then
+TASK_SECRET_TTL = 900
+
+# Global Arq connection pool
+_pool: Optional[ArqRedis] = None
+
+def get_redis_settings() -> RedisSettings:
+    """Arq connection settings derived from REDIS_URL"""
+    return RedisSettings.from_dsn(get_settings().redis_url)
+
+async def get_task_queue() -> ArqRedis:
+    """Get Arq pool instance with lazy initialization"""
+    global _pool
+    if _pool is None:
+        _pool = await create_pool(get_redis_settings(), default_queue_name=ANALYSIS_QUEUE)
+        logger.info("Connected to analysis task queue")
+    return _pool
+
+async def close_task_queue():
+    """Close the Arq connection pool"""
+    global _pool
+    if _pool is not None:
+        try:
+            await _pool.aclose()
+            logger.info("Analysis task queue connection closed")
+        except Exception as e:
+            logger.warning(f"Error closing task queue connection: {e}")
+        _pool = None
+
+def _task_secret_key(task_id: str) -> str:
+    return f"task_secret:{task_id}"
+
+def _secret_cipher() -> Fernet:
+    """Cipher for task secrets, keyed from SECRET_KEY"""
+    key = hashlib.sha256(get_settings().secret_key.encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+async def store_task_secret(task_id: str, secret: str):
+    """Keep an encrypted secret for a queued task until the worker takes it, outside the job arguments"""
+    pool = await get_task_queue()
+    await pool.set(_task_secret_key(task_id), _secret_cipher().encrypt(secret.encode("utf-8")), ex=TASK_SECRET_TTL)
+
+async def pop_task_secret(task_id: str) -> Optional[str]:
+    """Read and delete a task's secret; None if it was never stored, expired or cannot be decrypted"""
+    pool = await get_task_queue()
+    async with pool.pipeline(transaction=True) as pipe:
+        pipe.get(_task_secret_key(task_id))
+        pipe.delete(_task_secret_key(task_id))
+        token, _ = await pipe.execute()
+    if token is None:
+        return None
+    try:
+        return _secret_cipher().decrypt(token, ttl=TASK_SECRET_TTL).decode("utf-8")
+    except InvalidToken:
+        logger.warning(f"Discarding unreadable secret for task {task_id}")
+        return None
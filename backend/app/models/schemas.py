@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl, validator
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -11,21 +11,19 @@ class TaskStatus(str, Enum):
 
 class AnalysisRequest(BaseModel):
     """Request model for starting repository analysis"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     repository_url: HttpUrl
     api_key: Optional[str] = None
     include_dependencies: bool = True
     generate_mocks: bool = True
-    target_coverage: int = 80
+    target_coverage: int = Field(default=80, ge=0, le=100)
     max_files: Optional[int] = None
-    
-    @validator('target_coverage')
-    def validate_coverage(cls, v):
-        if not 0 <= v <= 100:
-            raise ValueError('Coverage must be between 0 and 100')
-        return v
 
 class AnalysisResponse(BaseModel):
     """Response model for analysis task creation"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     task_id: str
     status: TaskStatus
     message: str
@@ -33,6 +31,8 @@ class AnalysisResponse(BaseModel):
 
 class TaskStatusResponse(BaseModel):
     """Response model for task status"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     task_id: str
     status: TaskStatus
     current_step: str
@@ -44,6 +44,8 @@ class TaskStatusResponse(BaseModel):
 
 class AnalysisResult(BaseModel):
     """Response model for analysis results"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     task_id: str
     status: TaskStatus
     repository_url: str
@@ -71,6 +73,8 @@ class AnalysisResult(BaseModel):
 
 class LanguageInfo(BaseModel):
     """Information about detected programming language"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     language: str
     framework: str
     file_count: int
@@ -79,6 +83,8 @@ class LanguageInfo(BaseModel):
 
 class TestFileInfo(BaseModel):
     """Information about generated test file"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     file_path: str
     language: str
     framework: str
@@ -88,6 +94,8 @@ class TestFileInfo(BaseModel):
 
 class CoverageReport(BaseModel):
     """Coverage report information"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     overall_coverage: float
     language_breakdown: Dict[str, float]
     file_breakdown: List[Dict[str, Any]]
@@ -95,12 +103,16 @@ class CoverageReport(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Error response model"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     error: str
     message: str
     details: Optional[Dict[str, Any]] = None
 
 class HealthResponse(BaseModel):
     """Health check response"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     status: str
     service: str
     timestamp: datetime
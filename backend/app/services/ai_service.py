@@ -1,28 +1,105 @@
 import httpx
-import json
+import orjson
 import asyncio
+import re
 import time
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
-from app.core.config import get_settings
+from app.core.config import get_settings, SUPPORTED_LANGUAGES
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Fenced code blocks in model responses, an unterminated fence runs to the end of the response
+CODE_FENCE_PATTERN = re.compile(r"^[ \t]*```[^\n]*\n(.*?)(^[ \t]*```|\Z)", re.DOTALL | re.MULTILINE)
+JSON_FENCE_PATTERN = re.compile(r"```json(.*?)(?:```|\Z)", re.DOTALL)
+ANY_FENCE_PATTERN = re.compile(r"```(.*?)(?:```|\Z)", re.DOTALL)
+
+# Prompt for generate_unit_tests, filled with str.format
+TEST_GENERATION_PROMPT = """You are an expert software testing engineer. Generate comprehensive unit tests for the following {language} code using {framework}.
+
+Source File: {file_path}
+Framework: {framework}
+
+Source Code:
+```{language}
+{source_code}
+```
+
+Requirements:
+1. Follow the AAA pattern (Arrange, Act, Assert)
+2. Test both positive and negative scenarios
+3. Include edge cases and boundary testing
+4. Use proper mocking for external dependencies
+5. Ensure high test coverage
+6. Write clear, readable test names
+7. Follow {framework} best practices
+
+Dependencies to mock: {dependencies}
+
+Generate only the test code without any explanations. The test should be ready to run immediately."""
+
+# HTTP/2 lets concurrent generation calls share one connection, it needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared OpenRouter HTTP client, reused across tasks so connections stay alive
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client with lazy initialization"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=30.0,  # Reduced timeout to 30 seconds
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 class AIService:
     """Service for interacting with OpenRouter AI models"""
     
-    def __init__(self, api_key: str):
+    # Request headers shared by every instance, only Authorization varies
+    BASE_HEADERS = {
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://ai-unit-testing-agent.com",
+        "X-Title": "AI Unit Testing Agent"
+    }
+    SYSTEM_MESSAGE = {
+        "role": "system",
+        "content": "You are an expert software testing engineer specializing in unit testing and test automation."
+    }
+    
+    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
+        settings = get_settings()
         self.api_key = api_key
+        self.http_client = http_client
         self.base_url = "https://openrouter.ai/api/v1"
+        self.completions_url = f"{self.base_url}/chat/completions"
+        self.headers = {**self.BASE_HEADERS, "Authorization": f"Bearer {api_key}"}
         self.models = [
-            get_settings().primary_model,
-            get_settings().secondary_model,
-            get_settings().backup_model
+            settings.primary_model,
+            settings.secondary_model,
+            settings.backup_model
         ]
+        self.max_tokens = settings.max_tokens_per_request
+        self.temperature = settings.temperature
         self.current_model_index = 0
-        self.rate_limit_delay = 5  # seconds between requests
+        self.rate_limit_delay = 5  # base backoff in seconds after a rate limit
+        self.max_rate_limit_delay = 60
+        self.request_semaphore = asyncio.Semaphore(settings.ai_concurrency)
         
     async def generate_unit_tests(
         self, 
@@ -46,6 +123,17 @@ class AIService:
             logger.error(f"Error generating tests for {file_path}: {e}")
             raise
     
+    async def generate_unit_tests_batch(self, files: List[Dict[str, Any]]) -> List[Any]:
+        """Generate unit tests for several files concurrently
+        
+        Each entry holds the keyword arguments of generate_unit_tests. Results
+        keep the input order, a failed file yields its exception instead of a string.
+        """
+        return await asyncio.gather(
+            *(self.generate_unit_tests(**file) for file in files),
+            return_exceptions=True
+        )
+    
     async def analyze_code_structure(
         self, 
         source_code: str, 
@@ -92,32 +180,15 @@ class AIService:
     ) -> str:
         """Create a prompt for test generation"""
         
-        framework_config = get_settings().supported_languages[language]
+        framework_config = SUPPORTED_LANGUAGES[language]
         
-        prompt = f"""You are an expert software testing engineer. Generate comprehensive unit tests for the following {language} code using {framework}.
-
-Source File: {file_path}
-Framework: {framework}
-
-Source Code:
-```{language}
-{source_code}
-```
-
-Requirements:
-1. Follow the AAA pattern (Arrange, Act, Assert)
-2. Test both positive and negative scenarios
-3. Include edge cases and boundary testing
-4. Use proper mocking for external dependencies
-5. Ensure high test coverage
-6. Write clear, readable test names
-7. Follow {framework} best practices
-
-{f'Dependencies to mock: {", ".join(dependencies) if dependencies else "None"}'}
-
-Generate only the test code without any explanations. The test should be ready to run immediately."""
-
-        return prompt
+        return TEST_GENERATION_PROMPT.format(
+            language=language,
+            framework=framework,
+            file_path=file_path,
+            source_code=source_code,
+            dependencies=", ".join(dependencies) if dependencies else "None"
+        )
     
     def _create_analysis_prompt(self, source_code: str, language: str, file_path: str) -> str:
         """Create a prompt for code structure analysis"""
@@ -187,59 +258,89 @@ Generate only the mock code without explanations."""
 
         return prompt
     
+    async def _read_completion_stream(self, response: httpx.Response) -> str:
+        """Collect the content deltas of a server-sent completion stream"""
+        parts = []
+        async for line in response.aiter_lines():
+            # Blank lines separate events, lines starting with ':' are keep-alive comments
+            if not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            chunk = orjson.loads(payload)
+            if "error" in chunk:
+                raise Exception(f"Stream error: {chunk['error']}")
+            for choice in chunk.get("choices", []):
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    parts.append(content)
+        return "".join(parts)
+    
+    def _rate_limit_backoff(self, response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait after a 429, honouring Retry-After when the provider sends it"""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_rate_limit_delay)
+            except ValueError:
+                pass
+        return min(self.rate_limit_delay * (2 ** attempt), self.max_rate_limit_delay)
+    
     async def _make_ai_request(self, prompt: str) -> str:
         """Make a request to the AI model with fallback strategy"""
+        async with self.request_semaphore:
+            return await self._send_ai_request(prompt)
+    
+    async def _send_ai_request(self, prompt: str) -> str:
+        """Try each model in turn until one answers"""
+        messages = [self.SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
         
-        for attempt in range(len(self.models)):
-            model = self.models[self.current_model_index]
+        # Rotate from a per-call snapshot, so concurrent requests cannot advance each other's position
+        model_count = len(self.models)
+        start = self.current_model_index
+        for attempt in range(model_count):
+            model_index = (start + attempt) % model_count
+            model = self.models[model_index]
             
             try:
-                logger.info(f"Attempting AI request with model: {model}")
-                async with httpx.AsyncClient(timeout=30.0) as client:  # Reduced timeout to 30 seconds
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {self.api_key}",
-                            "Content-Type": "application/json",
-                            "HTTP-Referer": "https://ai-unit-testing-agent.com",
-                            "X-Title": "AI Unit Testing Agent"
-                        },
-                        json={
-                            "model": model,
-                            "messages": [
-                                {
-                                    "role": "system",
-                                    "content": "You are an expert software testing engineer specializing in unit testing and test automation."
-                                },
-                                {
-                                    "role": "user",
-                                    "content": prompt
-                                }
-                            ],
-                            "max_tokens": get_settings().max_tokens_per_request,
-                            "temperature": get_settings().temperature
-                        }
-                    )
-                    
+                logger.info("Attempting AI request with model: %s", model)
+                client = self.http_client or get_http_client()
+                backoff = None
+                async with client.stream(
+                    "POST",
+                    self.completions_url,
+                    headers=self.headers,
+                    json={
+                        "model": model,
+                        "messages": messages,
+                        "max_tokens": self.max_tokens,
+                        "temperature": self.temperature,
+                        "stream": True
+                    }
+                ) as response:
                     if response.status_code == 200:
-                        data = response.json()
-                        logger.info(f"AI request successful with model: {model}")
-                        return data["choices"][0]["message"]["content"]
+                        content = await self._read_completion_stream(response)
+                        logger.info("AI request successful with model: %s", model)
+                        # Later requests start from the last model that answered
+                        self.current_model_index = model_index
+                        return content
                     
                     elif response.status_code == 429:  # Rate limit
-                        logger.warning(f"Rate limit hit for model {model}, trying next model")
-                        self.current_model_index = (self.current_model_index + 1) % len(self.models)
-                        await asyncio.sleep(self.rate_limit_delay)
-                        continue
+                        logger.warning("Rate limit hit for model %s, trying next model", model)
+                        backoff = self._rate_limit_backoff(response, attempt)
                     
                     else:
-                        logger.error(f"API request failed for model {model}: {response.status_code} - {response.text}")
-                        self.current_model_index = (self.current_model_index + 1) % len(self.models)
-                        continue
-                        
+                        await response.aread()
+                        logger.error("API request failed for model %s: %d - %s", model, response.status_code, response.text)
+                
+                if backoff is not None:
+                    # Back off after the connection has been released to the pool
+                    await asyncio.sleep(backoff)
+                continue
+                    
             except Exception as e:
-                logger.error(f"Error with model {model}: {e}")
-                self.current_model_index = (self.current_model_index + 1) % len(self.models)
+                logger.error("Error with model %s: %s", model, e)
                 continue
         
         raise Exception("All AI models failed to respond")
@@ -248,17 +349,11 @@ Generate only the mock code without explanations."""
         """Extract test code from AI response"""
         # Remove markdown code blocks if present
         if "```" in response:
-            lines = response.split("\n")
-            in_code_block = False
             code_lines = []
-            
-            for line in lines:
-                if line.strip().startswith("```"):
-                    in_code_block = not in_code_block
-                    continue
-                if in_code_block:
-                    code_lines.append(line)
-            
+            for match in CODE_FENCE_PATTERN.finditer(response):
+                block_lines = match.group(1).split("\n")
+                # A closed block ends with the newline before its closing fence, which starts no line
+                code_lines.extend(block_lines[:-1] if match.group(2) else block_lines)
             return "\n".join(code_lines)
         
         return response.strip()
@@ -271,20 +366,12 @@ Generate only the mock code without explanations."""
         """Parse the analysis response from AI"""
         try:
             # Try to extract JSON from the response
-            if "```json" in response:
-                start = response.find("```json") + 7
-                end = response.find("```", start)
-                json_str = response[start:end].strip()
-            elif "```" in response:
-                start = response.find("```") + 3
-                end = response.find("```", start)
-                json_str = response[start:end].strip()
-            else:
-                json_str = response.strip()
+            match = JSON_FENCE_PATTERN.search(response) or ANY_FENCE_PATTERN.search(response)
+            json_str = (match.group(1) if match else response).strip()
             
-            return json.loads(json_str)
+            return orjson.loads(json_str)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse analysis response: {e}")
             # Return a default structure
             return {
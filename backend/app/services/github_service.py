@@ -1,22 +1,191 @@
-import git
+import codecs
+import fnmatch
+import hashlib
 import os
 import shutil
+import stat
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import json
 from urllib.parse import urlparse
 import logging
-from app.core.config import get_settings
+from app.core.config import get_settings, SUPPORTED_LANGUAGES, EXT_TO_LANG, LANGUAGE_FRAMEWORKS
 from app.core.logging import get_logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 logger = get_logger(__name__)
 
+# Bare clones reused across tasks live under temp/_repo_cache, one per repository URL
+REPO_CACHE_DIR_NAME = "_repo_cache"
+_repo_cache_locks: Dict[str, threading.Lock] = {}
+_repo_cache_locks_guard = threading.Lock()
+
+@contextmanager
+def _repo_cache_lock(cache_dir: Path):
+    """Serialize use of one cached repository across threads and, where flock exists, processes"""
+    with _repo_cache_locks_guard:
+        lock = _repo_cache_locks.setdefault(str(cache_dir), threading.Lock())
+    with lock:
+        cache_dir.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(f"{cache_dir}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def evict_repo_cache(cache_root: Path, keep: Optional[Path] = None) -> int:
+    """Remove cached clones beyond REPO_CACHE_MAX_ENTRIES or unused for REPO_CACHE_MAX_AGE, oldest first"""
+    settings = get_settings()
+    try:
+        with os.scandir(cache_root) as entries:
+            # A clone's mtime is bumped on every checkout, so it records its last use
+            cached = [
+                (entry.stat(follow_symlinks=False).st_mtime, Path(entry.path))
+                for entry in entries if entry.is_dir(follow_symlinks=False)
+            ]
+    except FileNotFoundError:
+        return 0
+    
+    cached.sort(key=lambda item: item[0], reverse=True)
+    now = time.time()
+    removed = 0
+    for index, (mtime, cache_dir) in enumerate(cached):
+        if cache_dir == keep:
+            continue
+        if index < settings.repo_cache_max_entries and now - mtime <= settings.repo_cache_max_age:
+            continue
+        with _repo_cache_lock(cache_dir):
+            try:
+                # A task may have checked out from it while we waited for the lock
+                if cache_dir.stat().st_mtime != mtime:
+                    continue
+            except FileNotFoundError:
+                continue
+            # Lock files stay: another process may be waiting on this one's inode
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            removed += 1
+            logger.info(f"Evicted cached repository clone: {cache_dir.name}")
+    return removed
+
+# Threads used to delete a cloned repository's top-level directories
+CLEANUP_WORKERS = 8
+
+# Directories never descended into during repository analysis (hidden ones are skipped too)
+IGNORED_DIRS = frozenset({"node_modules", "__pycache__", ".git"})
+
+# Test file naming per language as (prefixes, suffixes, lowercase substrings)
+TEST_FILE_RULES = {
+    "python": (("test_",), ("_test.py",), ()),
+    "javascript": ((), (".test.js", ".spec.js"), ("test",)),
+    "java": ((), ("Test.java",), ()),
+    "csharp": ((), ("Tests.cs",), ()),
+    "go": ((), ("_test.go",), ()),
+    "ruby": ((), ("_spec.rb",), ()),
+    "php": ((), ("Test.php",), ()),
+}
+
+# Root-level configuration files as name or wildcard -> (language, precedence), later entries in
+# a language's config_files take precedence over earlier ones
+CONFIG_FILE_NAMES = {
+    config_file: (language, index)
+    for language, config in SUPPORTED_LANGUAGES.items()
+    for index, config_file in enumerate(config["config_files"])
+    if "*" not in config_file
+}
+CONFIG_FILE_PATTERNS = [
+    (config_file, language, index)
+    for language, config in SUPPORTED_LANGUAGES.items()
+    for index, config_file in enumerate(config["config_files"])
+    if "*" in config_file
+]
+
+def _match_config_file(filename: str) -> Optional[Tuple[str, int]]:
+    """Return (language, precedence) if filename is a known configuration file"""
+    match = CONFIG_FILE_NAMES.get(filename)
+    if match is not None:
+        return match
+    for pattern, language, index in CONFIG_FILE_PATTERNS:
+        if fnmatch.fnmatch(filename, pattern):
+            return language, index
+    return None
+
+def _walk_repository(repo_path: Path) -> Iterator[Tuple[str, str]]:
+    """Yield (file name, path relative to repo_path) top-down, skipping hidden and ignored entries"""
+    stack = [(str(repo_path), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        subdirs = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in IGNORED_DIRS:
+                        subdirs.append((entry.path, prefix + name + os.sep))
+                else:
+                    yield name, prefix + name
+        # Reversed so subdirectories are visited in scandir order, like os.walk
+        stack.extend(reversed(subdirs))
+
 class GitHubService:
     """Service for handling GitHub repository operations"""
     
     def __init__(self):
         self.temp_dir = get_settings().temp_dir
+        self.repo_cache_dir = self.temp_dir / REPO_CACHE_DIR_NAME
+        
+    def _run_git(self, *args: str) -> subprocess.CompletedProcess:
+        """Run a git command without ever prompting for credentials"""
+        return subprocess.run(
+            ["git", *args],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        )
+    
+    def _checkout_from_cache(self, repository_url: str, repo_dir: Path):
+        """Check out the latest default branch commit into repo_dir through a cached bare clone"""
+        cache_dir = self.repo_cache_dir / hashlib.sha1(repository_url.encode("utf-8")).hexdigest()
+        with _repo_cache_lock(cache_dir):
+            if (cache_dir / "HEAD").exists():
+                # Only the commits since the last analysis cross the network
+                self._run_git("-C", str(cache_dir), "fetch", "--depth=1", "--filter=blob:none", "--no-tags", "origin", "HEAD")
+                revision = "FETCH_HEAD"
+            else:
+                self._run_git(
+                    "clone", "--bare", "--depth=1", "--filter=blob:none", "--single-branch", "--no-tags",
+                    repository_url, str(cache_dir)
+                )
+                revision = "HEAD"
+            # Forget worktrees whose task directories have been cleaned up
+            self._run_git("-C", str(cache_dir), "worktree", "prune")
+            self._run_git("-C", str(cache_dir), "worktree", "add", "--detach", str(repo_dir), revision)
+            # Mark the clone as recently used for eviction
+            os.utime(cache_dir)
         
+        # Outside this clone's lock, so evictions never hold two cache locks at once
+        try:
+            evict_repo_cache(self.repo_cache_dir, keep=cache_dir)
+        except OSError as e:
+            logger.warning(f"Could not evict cached repository clones: {e}")
+    
     def clone_repository(self, repository_url: str, task_id: str) -> Path:
         """Clone a GitHub repository to a temporary directory"""
         try:
@@ -26,19 +195,24 @@ class GitHubService:
             
             logger.info(f"Cloning repository: {repository_url}")
             
-            # Clone the repository
-            git.Repo.clone_from(
-                repository_url,
-                repo_dir,
-                depth=1  # Shallow clone for faster download
-            )
+            try:
+                self._checkout_from_cache(repository_url, repo_dir)
+            except subprocess.CalledProcessError as e:
+                logger.warning(f"Repository cache unavailable, cloning directly: {(e.stderr or '').strip() or e}")
+                shutil.rmtree(repo_dir, ignore_errors=True)
+                # Shallow, partial clone of the default branch only, analysis never needs history or tags
+                self._run_git(
+                    "clone", "--depth=1", "--filter=blob:none", "--single-branch", "--no-tags",
+                    repository_url, str(repo_dir)
+                )
             
             logger.info(f"Repository cloned successfully to: {repo_dir}")
             return repo_dir
             
-        except git.exc.GitCommandError as e:
-            logger.error(f"Failed to clone repository: {e}")
-            raise Exception(f"Failed to clone repository: {str(e)}")
+        except subprocess.CalledProcessError as e:
+            error = (e.stderr or "").strip() or str(e)
+            logger.error(f"Failed to clone repository: {error}")
+            raise Exception(f"Failed to clone repository: {error}")
         except Exception as e:
             logger.error(f"Unexpected error cloning repository: {e}")
             raise
@@ -54,39 +228,42 @@ class GitHubService:
                 "main_files": []
             }
             
+            languages = analysis["languages"]
+            main_files = analysis["main_files"]
+            config_precedence = {}
+            
             # Walk through all files in the repository
-            for root, dirs, files in os.walk(repo_path):
-                # Skip hidden directories and common ignore patterns
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', '.git']]
+            for filename, relative_path in _walk_repository(repo_path):
+                # Detect configuration files in the repository root
+                if relative_path == filename:
+                    config_match = _match_config_file(filename)
+                    if config_match is not None:
+                        config_language, precedence = config_match
+                        if precedence > config_precedence.get(config_language, -1):
+                            config_precedence[config_language] = precedence
+                            analysis["config_files"][config_language] = str(repo_path / filename)
                 
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                        
-                    file_path = Path(root) / file
-                    relative_path = file_path.relative_to(repo_path)
-                    
-                    # Detect language based on file extension
-                    language = self._detect_language(file_path)
+                # Detect language based on file extension
+                language = self._detect_language(filename)
+                
+                if language:
+                    entry = languages.get(language)
+                    if entry is None:
+                        entry = languages[language] = {
+                            "files": [],
+                            "count": 0,
+                            "framework": LANGUAGE_FRAMEWORKS[language]
+                        }
+                    entry["files"].append(relative_path)
                     
-                    if language:
-                        if language not in analysis["languages"]:
-                            analysis["languages"][language] = {
-                                "files": [],
-                                "count": 0,
-                                "framework": get_settings().supported_languages[language]["framework"]
-                            }
-                        
-                        analysis["languages"][language]["files"].append(str(relative_path))
-                        analysis["languages"][language]["count"] += 1
-                        analysis["total_files"] += 1
-                        
-                        # Check if it's a main source file (not test file)
-                        if not self._is_test_file(file_path, language):
-                            analysis["main_files"].append(str(relative_path))
+                    # Check if it's a main source file (not test file)
+                    if not self._is_test_file(filename, language):
+                        main_files.append(relative_path)
             
-            # Detect configuration files
-            analysis["config_files"] = self._detect_config_files(repo_path)
+            # Counts are derived once from the collected file lists
+            for entry in languages.values():
+                entry["count"] = len(entry["files"])
+            analysis["total_files"] = sum(entry["count"] for entry in languages.values())
             
             logger.info(f"Repository analysis completed: {analysis['total_files']} files, {len(analysis['languages'])} languages")
             return analysis
@@ -95,67 +272,41 @@ class GitHubService:
             logger.error(f"Error analyzing repository structure: {e}")
             raise
     
-    def _detect_language(self, file_path: Path) -> Optional[str]:
+    def _detect_language(self, filename: str) -> Optional[str]:
         """Detect programming language based on file extension"""
-        extension = file_path.suffix.lower()
-        
-        for language, config in get_settings().supported_languages.items():
-            if extension in config["file_extensions"]:
-                return language
-        
-        return None
+        return EXT_TO_LANG.get(os.path.splitext(filename)[1].lower())
     
-    def _is_test_file(self, file_path: Path, language: str) -> bool:
-        """Check if a file is a test file"""
-        filename = file_path.name
-        test_pattern = get_settings().supported_languages[language]["test_pattern"]
-        
-        if language == "python":
-            return filename.startswith("test_") or filename.endswith("_test.py")
-        elif language == "javascript":
-            return "test" in filename.lower() or filename.endswith(".test.js") or filename.endswith(".spec.js")
-        elif language == "java":
-            return filename.endswith("Test.java")
-        elif language == "csharp":
-            return filename.endswith("Tests.cs")
-        elif language == "go":
-            return filename.endswith("_test.go")
-        elif language == "ruby":
-            return filename.endswith("_spec.rb")
-        elif language == "php":
-            return filename.endswith("Test.php")
-        
-        return False
-    
-    def _detect_config_files(self, repo_path: Path) -> Dict[str, str]:
-        """Detect configuration files for different languages"""
-        config_files = {}
-        
-        for language, config in get_settings().supported_languages.items():
-            for config_file in config["config_files"]:
-                # Handle wildcard patterns
-                if "*" in config_file:
-                    import glob
-                    matches = glob.glob(str(repo_path / config_file))
-                    if matches:
-                        config_files[language] = matches[0]
-                else:
-                    config_path = repo_path / config_file
-                    if config_path.exists():
-                        config_files[language] = str(config_path)
-        
-        return config_files
+    def _is_test_file(self, filename: str, language: str) -> bool:
+        """Check if a file name is a test file"""
+        rules = TEST_FILE_RULES.get(language)
+        if rules is None:
+            return False
+        prefixes, suffixes, substrings = rules
+        return (
+            filename.startswith(prefixes)
+            or filename.endswith(suffixes)
+            or (bool(substrings) and any(part in filename.lower() for part in substrings))
+        )
     
     def get_file_content(self, file_path: Path, max_size: int = 100000) -> str:
         """Get the content of a file with size limit"""
         try:
-            if file_path.stat().st_size > max_size:
-                logger.warning(f"File {file_path} is too large, truncating")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read(max_size) + "\n# ... (truncated due to size)"
+            # One extra byte tells us whether the file exceeds max_size without a stat call
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                data = os.read(fd, max_size + 1)
+            finally:
+                os.close(fd)
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            truncated = len(data) > max_size
+            # A truncated read may end inside a multi-byte character, which must not count as invalid
+            content = codecs.getincrementaldecoder("utf-8")().decode(data[:max_size], final=not truncated)
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+            
+            if truncated:
+                logger.warning(f"File {file_path} is too large, truncating")
+                return content + "\n# ... (truncated due to size)"
+            return content
                 
         except UnicodeDecodeError:
             logger.warning(f"Could not decode file {file_path} as UTF-8")
@@ -164,37 +315,33 @@ class GitHubService:
             logger.error(f"Error reading file {file_path}: {e}")
             return f"# Error reading file: {str(e)}"
     
+    @staticmethod
+    def _on_rm_error(func, path, exc):
+        """Clear the read-only bit (git pack files on Windows) and retry the removal"""
+        os.chmod(path, stat.S_IWRITE)
+        func(path)
+    
+    def _rmtree(self, path: str):
+        """Remove a directory tree, retrying read-only entries"""
+        if sys.version_info >= (3, 12):
+            shutil.rmtree(path, onexc=self._on_rm_error)
+        else:
+            shutil.rmtree(path, onerror=self._on_rm_error)
+    
     def cleanup_repository(self, task_id: str):
         """Clean up the cloned repository"""
         try:
-            repo_path = Path("temp") / task_id
+            repo_path = self.temp_dir / task_id
             if repo_path.exists():
                 logger.info(f"Cleaning up repository: {repo_path}")
                 
-                # On Windows, try to handle file access issues
-                import platform
-                if platform.system() == "Windows":
-                    try:
-                        # First try normal removal
-                        shutil.rmtree(repo_path)
-                    except PermissionError:
-                        logger.warning(f"Permission error during cleanup, trying alternative method for {repo_path}")
-                        try:
-                            # Try to remove read-only attributes first
-                            import subprocess
-                            subprocess.run(["attrib", "-R", str(repo_path / "*"), "/S"], 
-                                         capture_output=True, shell=True)
-                            # Wait a moment
-                            import time
-                            time.sleep(1)
-                            # Try removal again
-                            shutil.rmtree(repo_path)
-                        except Exception as e:
-                            logger.error(f"Failed to cleanup repository {repo_path}: {e}")
-                            # Don't raise the exception, just log it
-                else:
-                    # On non-Windows systems, use normal removal
-                    shutil.rmtree(repo_path)
+                # Remove top-level directories in parallel, then whatever is left
+                with os.scandir(repo_path) as entries:
+                    subdirs = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+                if subdirs:
+                    with ThreadPoolExecutor(max_workers=min(CLEANUP_WORKERS, len(subdirs))) as executor:
+                        list(executor.map(self._rmtree, subdirs))
+                self._rmtree(str(repo_path))
                     
                 logger.info(f"Repository cleanup completed: {repo_path}")
         except Exception as e:
@@ -212,3 +359,8 @@ class GitHubService:
             )
         except Exception:
             return False
+
+@lru_cache(maxsize=1)
+def get_github_service() -> GitHubService:
+    """Get the process-wide GitHub service (it holds no per-task state)"""
+    return GitHubService()
@@ -1,29 +1,64 @@
 import asyncio
+import hashlib
+import httpx
 import json
+import os
+import re
 import shutil
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
 import logging
 from app.core.config import get_settings
 from app.core.logging import get_logger
-from app.services.github_service import GitHubService
+from app.services.github_service import get_github_service
 from app.services.ai_service import AIService
-from app.services.test_runner_service import TestRunnerService
+from app.services.test_runner_service import get_test_runner_service
 from app.core.database import ModelUsageManager
 
 logger = get_logger(__name__)
 
+# Generated test code by (language, framework, file path, source digest), shared by the analyses in this process
+GENERATION_CACHE_MAX_SIZE = 1024
+_generation_cache: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+_generation_in_flight: Dict[Tuple[str, str, str, str], "asyncio.Future[str]"] = {}
+
+# Lines counted as one test each: python test functions, JS test/it/describe blocks,
+# Java @Test annotations and C# [Test] attributes
+TEST_COUNT_PATTERNS = {
+    "python": re.compile(r"^[ \t]*def test_", re.MULTILINE),
+    "javascript": re.compile(r"^.*?(?:test\(|it\(|describe\()", re.MULTILINE),
+    "java": re.compile(r"^.*?@Test", re.MULTILINE),
+    "csharp": re.compile(r"^.*?\[Test\]", re.MULTILINE),
+}
+
+# Sources shorter than this many characters, or without anything testable defined, are not sent to the AI
+MIN_SOURCE_CHARS = 64
+DEFINITION_PATTERNS = {
+    "python": re.compile(r"^[ \t]*(?:async[ \t]+)?(?:def|class)[ \t]", re.MULTILINE),
+    "javascript": re.compile(r"\b(?:function|class)\b|=>|\bexport[ \t]+(?:default[ \t]+)?(?:const|let|var)\b"),
+    "java": re.compile(r"\b(?:class|interface|enum|record)[ \t]+\w"),
+    "csharp": re.compile(r"\b(?:class|struct|interface|record)[ \t]+\w"),
+    "go": re.compile(r"^func[ \t(]", re.MULTILINE),
+    "ruby": re.compile(r"^[ \t]*(?:def|class|module)[ \t]", re.MULTILINE),
+    "php": re.compile(r"\b(?:function|class|trait)[ \t]+\w"),
+}
+
 class TestGeneratorService:
     """Main service for orchestrating the test generation process"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key
-        self.github_service = GitHubService()
-        self.ai_service = AIService(api_key)
-        self.test_runner = TestRunnerService()
+        self.github_service = get_github_service()
+        self.ai_service = AIService(api_key, http_client)
+        self.test_runner = get_test_runner_service()
+        self._usage_batch: List[Dict[str, Any]] = []
+        self._created_dirs: Set[Path] = set()
+        # Limits how many files are generated concurrently
+        self.generation_semaphore = asyncio.Semaphore(get_settings().ai_concurrency)
         
     async def generate_tests_for_repository(
         self, 
@@ -37,19 +72,19 @@ class TestGeneratorService:
         try:
             # Step 1: Clone repository
             if progress_callback:
-                progress_callback(10, "Cloning repository...")
+                await progress_callback(10, "Cloning repository...")
             
             repo_path = await self._clone_repository(repository_url, task_id)
             
             # Step 2: Analyze repository structure
             if progress_callback:
-                progress_callback(20, "Analyzing repository structure...")
+                await progress_callback(20, "Analyzing repository structure...")
             
-            analysis = self.github_service.analyze_repository_structure(repo_path)
+            analysis = await asyncio.to_thread(self.github_service.analyze_repository_structure, repo_path)
             
             # Step 3: Generate tests for each language
             if progress_callback:
-                progress_callback(30, "Generating unit tests...")
+                await progress_callback(30, "Generating unit tests...")
             
             test_results = await self._generate_tests_for_languages(
                 repo_path, analysis, task_id, progress_callback
@@ -57,7 +92,7 @@ class TestGeneratorService:
             
             # Step 4: Run tests and generate coverage
             if progress_callback:
-                progress_callback(80, "Running tests and generating coverage...")
+                await progress_callback(80, "Running tests and generating coverage...")
             
             coverage_results = await self._run_tests_and_coverage(
                 repo_path, test_results, progress_callback
@@ -65,14 +100,14 @@ class TestGeneratorService:
             
             # Step 5: Prepare final results
             if progress_callback:
-                progress_callback(90, "Preparing final results...")
+                await progress_callback(90, "Preparing final results...")
             
             final_results = self._prepare_final_results(
                 analysis, test_results, coverage_results, task_id
             )
             
             if progress_callback:
-                progress_callback(100, "Analysis completed!")
+                await progress_callback(100, "Analysis completed!")
             
             return final_results
             
@@ -80,14 +115,14 @@ class TestGeneratorService:
             logger.error(f"Error in test generation process: {e}")
             raise
         finally:
+            await self._flush_model_usage()
             # Cleanup - DISABLED for manual cleanup
             # if repo_path and repo_path.exists():
             #     self.github_service.cleanup_repository(task_id)
-            pass
     
     async def _clone_repository(self, repository_url: str, task_id: str) -> Path:
         """Clone the repository"""
-        return self.github_service.clone_repository(repository_url, task_id)
+        return await asyncio.to_thread(self.github_service.clone_repository, repository_url, task_id)
     
     async def _generate_tests_for_languages(
         self, 
@@ -108,7 +143,7 @@ class TestGeneratorService:
                 progress = 30 + (current_language / total_languages) * 40
                 
                 if progress_callback:
-                    progress_callback(
+                    await progress_callback(
                         int(progress), 
                         f"Generating tests for {language} ({current_language}/{total_languages})..."
                     )
@@ -142,28 +177,43 @@ class TestGeneratorService:
         test_files = []
         generated_tests = 0
         
+        async def generate(file_path: str) -> Tuple[str, bool]:
+            async with self.generation_semaphore:
+                return await self._generate_test_code(file_path, language, framework, repo_path)
+        
+        # Skip test files
+        pending_files = []
         for file_path in source_files:
+            if self.github_service._is_test_file(Path(file_path).name, language):
+                logger.info(f"Skipping test file: {file_path}")
+            else:
+                pending_files.append(file_path)
+        
+        # Generate test code using AI, a bounded number of files at a time
+        logger.info(f"Generating tests for {len(pending_files)} {language} files")
+        generated = await asyncio.gather(
+            *(generate(file_path) for file_path in pending_files),
+            return_exceptions=True
+        )
+        
+        for file_path, result in zip(pending_files, generated):
             try:
-                logger.info(f"Processing file: {file_path}")
-                
-                # Skip test files
-                if self._is_test_file(file_path, language):
-                    logger.info(f"Skipping test file: {file_path}")
-                    continue
-                
-                # Generate test code using AI
-                test_code = await self._generate_test_code(file_path, language, framework, repo_path)
+                if isinstance(result, Exception):
+                    raise result
+                test_code, cache_hit = result
                 
                 if test_code:
                     # Create test file
-                    test_file_path = self._create_test_file(repo_path, file_path, test_code, language, framework)
+                    test_file_path = await asyncio.to_thread(
+                        self._create_test_file, repo_path, file_path, test_code, language, framework
+                    )
                     
                     # Count tests in the generated code
-                    test_count = self._count_tests_in_code(test_code, language)
+                    test_count = self._count_test_functions(test_code, language)
                     generated_tests += test_count
                     
                     # Track model usage
-                    self._track_model_usage(task_id, language, str(file_path))
+                    self._track_model_usage(task_id, language, str(file_path), cache_hit)
                     
                     # Add to test files list
                     test_files.append({
@@ -181,6 +231,8 @@ class TestGeneratorService:
                 logger.error(f"Error generating tests for {file_path}: {e}")
                 continue
         
+        await self._flush_model_usage()
+        
         return {
             "framework": framework,
             "files": test_files,
@@ -188,79 +240,97 @@ class TestGeneratorService:
             "success": len(test_files) > 0
         }
     
-    def _track_model_usage(self, task_id: str, language: str, file_path: str):
-        """Track AI model usage in MongoDB"""
+    def _track_model_usage(self, task_id: str, language: str, file_path: str, cache_hit: bool = False):
+        """Queue an AI model usage record, written by _flush_model_usage"""
+        self._usage_batch.append({
+            "task_id": task_id,
+            "model_name": "ai_service",
+            "language": language,
+            "file_path": file_path,
+            "tokens_used": 0,  # Will be updated when we have token counting
+            "requests_made": 0 if cache_hit else 1,
+            "cache_hit": cache_hit,
+            "cost": 0  # Will be updated when we have cost tracking
+        })
+    
+    async def _flush_model_usage(self):
+        """Write queued model usage records to MongoDB in one batch"""
+        if not self._usage_batch:
+            return
+        records, self._usage_batch = self._usage_batch, []
         try:
-            usage_data = {
-                "task_id": task_id,
-                "model_name": "ai_service",
-                "language": language,
-                "file_path": file_path,
-                "tokens_used": 0,  # Will be updated when we have token counting
-                "requests_made": 1,
-                "cost": 0,  # Will be updated when we have cost tracking
-                "created_at": datetime.utcnow()
-            }
-            
-            ModelUsageManager.create_usage_record(usage_data)
+            created_at = datetime.now(timezone.utc)
+            for record in records:
+                record["created_at"] = created_at
+            await ModelUsageManager.create_usage_records(records)
             
         except Exception as e:
             logger.error(f"Error tracking model usage: {e}")
     
-    def _is_test_file(self, file_path: str, language: str) -> bool:
-        """Check if a file is a test file"""
-        filename = Path(file_path).name
-        
-        if language == "python":
-            return filename.startswith("test_") or filename.endswith("_test.py")
-        elif language == "javascript":
-            return "test" in filename.lower() or filename.endswith(".test.js") or filename.endswith(".spec.js")
-        elif language == "java":
-            return filename.endswith("Test.java")
-        elif language == "csharp":
-            return filename.endswith("Tests.cs")
-        elif language == "go":
-            return filename.endswith("_test.go")
-        elif language == "ruby":
-            return filename.endswith("_spec.rb")
-        elif language == "php":
-            return filename.endswith("Test.php")
-        
-        return False
-    
-    async def _generate_test_code(self, file_path: str, language: str, framework: str, repo_path: Path) -> str:
-        """Generate test code for a specific file"""
+    async def _generate_test_code(self, file_path: str, language: str, framework: str, repo_path: Path) -> Tuple[str, bool]:
+        """Generate test code for a specific file, returning the code and whether it came from the cache"""
         try:
             full_path = repo_path / file_path
             if not full_path.exists():
                 logger.warning(f"File not found: {full_path}")
-                return ""
+                return "", False
             
             # Read source code
             logger.info(f"Reading source code from: {file_path}")
-            source_code = self.github_service.get_file_content(full_path)
+            source_code = await asyncio.to_thread(self.github_service.get_file_content, full_path)
             
-            # Analyze code structure
-            logger.info(f"Analyzing code structure for: {file_path}")
-            analysis = await self.ai_service.analyze_code_structure(
-                source_code, language, file_path
-            )
+            if not self._has_testable_code(source_code, language):
+                logger.info(f"Skipping file without testable definitions: {file_path}")
+                return "", False
             
-            # Generate tests
-            logger.info(f"Generating tests for: {file_path}")
-            test_code = await self.ai_service.generate_unit_tests(
-                source_code, language, framework, file_path, analysis.get("dependencies", [])
-            )
+            # Re-runs of an identical file reuse earlier results; the path is part of the key
+            # because the prompt names the source file, and tests import it by that path
+            key = (language, framework, file_path, hashlib.blake2b(source_code.encode("utf-8"), digest_size=16).hexdigest())
+            cached = _generation_cache.get(key)
+            if cached is not None:
+                _generation_cache.move_to_end(key)
+                logger.info(f"Reusing cached tests for: {file_path}")
+                return cached, True
+            in_flight = _generation_in_flight.get(key)
+            if in_flight is not None:
+                logger.info(f"Waiting for identical file being generated for: {file_path}")
+                return await in_flight, True
             
-            return test_code
+            future = asyncio.get_running_loop().create_future()
+            _generation_in_flight[key] = future
+            test_code = ""
+            try:
+                # Analyze code structure
+                logger.info(f"Analyzing code structure for: {file_path}")
+                analysis = await self.ai_service.analyze_code_structure(
+                    source_code, language, file_path
+                )
+                
+                # Generate tests
+                logger.info(f"Generating tests for: {file_path}")
+                test_code = await self.ai_service.generate_unit_tests(
+                    source_code, language, framework, file_path, analysis.get("dependencies", [])
+                )
+            finally:
+                del _generation_in_flight[key]
+                future.set_result(test_code)
+                if test_code:
+                    _generation_cache[key] = test_code
+                    if len(_generation_cache) > GENERATION_CACHE_MAX_SIZE:
+                        _generation_cache.popitem(last=False)
+            
+            return test_code, False
             
         except Exception as e:
             logger.error(f"Error generating test code for {file_path}: {e}")
-            return ""
+            return "", False
     
-    def _count_tests_in_code(self, test_code: str, language: str) -> int:
-        """Count the number of tests in the generated code"""
-        return self._count_test_functions(test_code, language)
+    def _has_testable_code(self, source_code: str, language: str) -> bool:
+        """Cheap pre-check that a source file is worth an AI round trip"""
+        if len(source_code) < MIN_SOURCE_CHARS:
+            return False
+        pattern = DEFINITION_PATTERNS.get(language)
+        return pattern is None or pattern.search(source_code) is not None
     
     def _create_test_file(
         self, 
@@ -275,9 +345,7 @@ class TestGeneratorService:
         source_path = Path(source_file)
         
         if language == "python":
-            # Create tests directory if it doesn't exist
             test_dir = repo_path / "tests"
-            test_dir.mkdir(exist_ok=True)
             
             # Create test file name
             test_filename = f"test_{source_path.stem}.py"
@@ -291,7 +359,6 @@ class TestGeneratorService:
         elif language == "java":
             # Create test directory structure
             test_dir = repo_path / source_path.parent / "test"
-            test_dir.mkdir(exist_ok=True)
             
             test_filename = f"{source_path.stem}Test.java"
             test_file_path = test_dir / test_filename
@@ -299,7 +366,6 @@ class TestGeneratorService:
         elif language == "csharp":
             # Create test directory
             test_dir = repo_path / source_path.parent / "Tests"
-            test_dir.mkdir(exist_ok=True)
             
             test_filename = f"{source_path.stem}Tests.cs"
             test_file_path = test_dir / test_filename
@@ -312,49 +378,28 @@ class TestGeneratorService:
         else:
             # Default: place in tests directory
             test_dir = repo_path / "tests"
-            test_dir.mkdir(exist_ok=True)
             test_file_path = test_dir / f"test_{source_path.name}"
         
-        # Write test code to file
-        test_file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(test_file_path, 'w', encoding='utf-8') as f:
-            f.write(test_code)
+        # Create the test directory once per analysis
+        if test_file_path.parent not in self._created_dirs:
+            test_file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(test_file_path.parent)
+        
+        # Write test code to file, encoded once and written straight to the fd
+        data = memoryview(test_code.encode('utf-8'))
+        fd = os.open(test_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
         
         return test_file_path
     
     def _count_test_functions(self, test_code: str, language: str) -> int:
         """Count the number of test functions in the generated code"""
-        count = 0
-        
-        if language == "python":
-            # Count functions starting with test_
-            lines = test_code.split('\n')
-            for line in lines:
-                if line.strip().startswith('def test_'):
-                    count += 1
-                    
-        elif language == "javascript":
-            # Count test/it/describe blocks
-            lines = test_code.split('\n')
-            for line in lines:
-                if any(keyword in line for keyword in ['test(', 'it(', 'describe(']):
-                    count += 1
-                    
-        elif language == "java":
-            # Count @Test annotations
-            lines = test_code.split('\n')
-            for line in lines:
-                if '@Test' in line:
-                    count += 1
-                    
-        elif language == "csharp":
-            # Count [Test] attributes
-            lines = test_code.split('\n')
-            for line in lines:
-                if '[Test]' in line:
-                    count += 1
-        
-        return count
+        pattern = TEST_COUNT_PATTERNS.get(language)
+        return len(pattern.findall(test_code)) if pattern else 0
     
     async def _run_tests_and_coverage(
         self, 
@@ -364,26 +409,13 @@ class TestGeneratorService:
     ) -> Dict[str, Any]:
         """Run tests and generate coverage reports"""
         
-        coverage_results = {}
-        
-        for language, lang_result in test_results.items():
-            if not lang_result.get("success", False):
-                continue
-                
-            try:
-                coverage = await self.test_runner.run_tests_with_coverage(
-                    repo_path, language, lang_result["framework"]
-                )
-                coverage_results[language] = coverage
-                
-            except Exception as e:
-                logger.error(f"Error running tests for {language}: {e}")
-                coverage_results[language] = {
-                    "error": str(e),
-                    "coverage": 0,
-                    "tests_passed": 0,
-                    "tests_failed": 0
-                }
+        frameworks = {
+            language: lang_result.get("framework", "")
+            for language, lang_result in test_results.items()
+            if lang_result.get("success", False)
+        }
+        # Languages of one repository are tested concurrently; each run reports its own errors
+        coverage_results = await self.test_runner.run_all_languages(repo_path, frameworks)
         
         return coverage_results
     
@@ -397,35 +429,38 @@ class TestGeneratorService:
         """Prepare the final results summary"""
         
         total_files = analysis["total_files"]
-        total_tests_generated = sum(
-            lang_result.get("generated_tests", 0) 
-            for lang_result in test_results.values()
-        )
+        
+        # Generated test totals and successful languages in one pass
+        total_tests_generated = 0
+        successful_languages = []
+        for lang, result in test_results.items():
+            total_tests_generated += result.get("generated_tests", 0)
+            if result.get("success", False):
+                successful_languages.append(lang)
 
         # Aggregate executed test metrics from coverage_results
         executed_passed = 0
         executed_failed = 0
         executed_total = 0
-        coverage_values: list[float] = []
+        coverage_sum = 0.0
+        coverage_count = 0
         for lang_result in coverage_results.values():
             if isinstance(lang_result, dict) and "error" not in lang_result:
-                executed_passed += int(lang_result.get("tests_passed", 0))
-                executed_failed += int(lang_result.get("tests_failed", 0))
+                get = lang_result.get
+                passed = int(get("tests_passed", 0))
+                failed = int(get("tests_failed", 0))
+                executed_passed += passed
+                executed_failed += failed
                 # Prefer explicit total_tests; otherwise derive
-                lang_total = int(lang_result.get("total_tests", 0))
-                if lang_total == 0:
-                    lang_total = int(lang_result.get("tests_total", 0))
-                if lang_total == 0:
-                    lang_total = int(lang_result.get("tests_passed", 0)) + int(lang_result.get("tests_failed", 0))
-                executed_total += lang_total
+                executed_total += int(get("total_tests", 0)) or int(get("tests_total", 0)) or passed + failed
 
                 # Coverage key normalization
-                if "coverage_percentage" in lang_result:
-                    coverage_values.append(float(lang_result.get("coverage_percentage", 0)))
-                elif "coverage" in lang_result:
-                    coverage_values.append(float(lang_result.get("coverage", 0)))
+                coverage = get("coverage_percentage", get("coverage"))
+                if coverage is not None:
+                    coverage_sum += float(coverage)
+                    coverage_count += 1
 
-        overall_coverage = round(sum(coverage_values) / len(coverage_values), 2) if coverage_values else 0.0
+        overall_coverage = round(coverage_sum / coverage_count, 2) if coverage_count else 0.0
         
         return {
             "task_id": task_id,
@@ -440,9 +475,6 @@ class TestGeneratorService:
                 "tests_failed": executed_failed,
                 "overall_coverage": overall_coverage,
                 "languages_detected": list(analysis["languages"].keys()),
-                "successful_languages": [
-                    lang for lang, result in test_results.items() 
-                    if result.get("success", False)
-                ]
+                "successful_languages": successful_languages
             }
         }
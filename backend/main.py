@@ -1,6 +1,9 @@
+import asyncio
+import hashlib
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import sys
@@ -11,12 +14,18 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app.api.routes import router
 from app.core.config import get_settings
 from app.core.database import init_db, close_db
-from app.core.logging import setup_logging
+from app.core.cache import close_cache
+from app.core.queue import close_task_queue
+from app.services.ai_service import close_http_client
+from app.services.github_service import REPO_CACHE_DIR_NAME, evict_repo_cache
+from app.core.logging import setup_logging, stop_logging, get_logger
 import shutil
 from pathlib import Path
 import signal
 import sys
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
@@ -32,6 +41,17 @@ def signal_handler(signum, frame):
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
+# Holds the requirements.txt hash of the last successful dependency install
+DEPS_SENTINEL_NAME = ".deps_ok"
+
+# Threads used to remove stale temp directories
+CLEANUP_WORKERS = 8
+
+def _remove_stale_dir(path: str) -> str:
+    """Remove one stale temp directory"""
+    shutil.rmtree(path, ignore_errors=True)
+    return path
+
 def cleanup_stale_temp_dirs():
     """Clean up stale temporary directories on startup"""
     try:
@@ -40,24 +60,37 @@ def cleanup_stale_temp_dirs():
         
         if temp_dir.exists():
             # Remove directories older than 1 hour
-            import time
             current_time = time.time()
             one_hour = 3600
             
-            for item in temp_dir.iterdir():
-                if item.is_dir():
+            # DirEntry caches its stat, so the type check and the age check share one syscall
+            stale_dirs = []
+            with os.scandir(temp_dir) as entries:
+                for entry in entries:
+                    # The shared clone cache outlives individual tasks and has its own eviction policy
+                    if entry.name == REPO_CACHE_DIR_NAME:
+                        continue
                     try:
-                        # Check if directory is older than 1 hour
-                        if current_time - item.stat().st_mtime > one_hour:
-                            shutil.rmtree(item, ignore_errors=True)
-                            print(f"Cleaned up stale temp directory: {item}")
-                    except Exception as e:
-                        print(f"Warning: Could not clean up {item}: {e}")
+                        if entry.is_dir(follow_symlinks=False):
+                            # Check if directory is older than 1 hour
+                            if current_time - entry.stat(follow_symlinks=False).st_mtime > one_hour:
+                                stale_dirs.append(entry.path)
+                    except OSError as e:
+                        logger.warning("Could not clean up %s: %s", entry.path, e)
+            
+            evict_repo_cache(temp_dir / REPO_CACHE_DIR_NAME)
+            
+            # Removing a tree is one unlink per file; independent trees are removed in parallel
+            if stale_dirs:
+                with ThreadPoolExecutor(max_workers=min(CLEANUP_WORKERS, len(stale_dirs))) as executor:
+                    for path in executor.map(_remove_stale_dir, stale_dirs):
+                        logger.debug("Cleaned up stale temp directory: %s", path)
     except Exception as e:
-        print(f"Warning: Error during temp directory cleanup: {e}")
+        logger.warning("Error during temp directory cleanup: %s", e)
 
 # Setup logging
 setup_logging()
+logger = get_logger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -65,7 +98,8 @@ app = FastAPI(
     description="An intelligent AI-powered agent for automated unit testing",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -86,9 +120,12 @@ app.mount("/downloads", StaticFiles(directory="downloads"), name="downloads")
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and other startup tasks"""
-    cleanup_stale_temp_dirs()
-    await init_db()
-    print("AI Unit Testing Agent started successfully!")
+    # The filesystem walk runs on a worker thread while the database connects
+    await asyncio.gather(
+        asyncio.to_thread(cleanup_stale_temp_dirs),
+        init_db()
+    )
+    logger.info("AI Unit Testing Agent started successfully!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -96,10 +133,15 @@ async def shutdown_event():
     try:
         print("Shutting down gracefully...")
         await close_db()
+        await close_cache()
+        await close_task_queue()
+        await close_http_client()
         print("AI Unit Testing Agent shutting down...")
     except Exception as e:
         print(f"Error during shutdown: {e}")
         # Continue with shutdown even if cleanup fails
+    finally:
+        stop_logging()
 
 @app.get("/")
 async def root():
@@ -125,13 +167,24 @@ if __name__ == "__main__":
     # Clean up stale temp directories on startup
     cleanup_stale_temp_dirs()
     
-    # Try to install dependencies
-    try:
-        subprocess.run([sys.executable, "install_deps.py"], check=True, cwd=Path(__file__).parent)
-    except FileNotFoundError:
-        print("install_deps.py not found, skipping dependency installation")
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to install dependencies: {e}")
+    # Opt-in with INSTALL_DEPS=1: install dependencies before serving, unless requirements.txt
+    # is unchanged since the last successful install. Startup waits for the whole install
+    backend_dir = Path(__file__).parent
+    requirements_file = backend_dir.parent / "requirements.txt"
+    deps_sentinel = backend_dir / DEPS_SENTINEL_NAME
+    if os.environ.get("INSTALL_DEPS") == "1":
+        if not requirements_file.exists():
+            print("requirements.txt not found, skipping dependency installation")
+        else:
+            requirements_hash = hashlib.sha256(requirements_file.read_bytes()).hexdigest()
+            if deps_sentinel.exists() and deps_sentinel.read_text() == requirements_hash:
+                print("Dependencies up to date, skipping installation")
+            else:
+                try:
+                    subprocess.run([sys.executable, "-m", "pip", "install", "-r", str(requirements_file)], check=True)
+                    deps_sentinel.write_text(requirements_hash)
+                except subprocess.CalledProcessError as e:
+                    print(f"Failed to install dependencies: {e}")
     
     print("AI Unit Testing Agent started successfully!")
     
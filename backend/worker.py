@@ -0,0 +1,51 @@
+"""
+Arq worker that runs repository analyses from the Redis task queue.
+
+Enable with USE_TASK_QUEUE=true and start from the backend directory:
+    arq worker.WorkerSettings
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from arq import func
+from app.api.routes import run_analysis_task
+from app.core.config import get_settings
+from app.core.database import init_db, close_db
+from app.core.cache import close_cache
+from app.core.logging import setup_logging, stop_logging
+from app.core.queue import ANALYSIS_QUEUE, get_redis_settings, pop_task_secret
+from app.services.ai_service import close_http_client
+
+setup_logging()
+
+async def run_analysis_job(ctx, task_id: str, repo_url: str):
+    """Run a queued analysis task with the API key submitted alongside it, or the configured key"""
+    api_key = await pop_task_secret(task_id)
+    return await run_analysis_task(task_id, repo_url, api_key)
+
+async def startup(ctx):
+    """Initialize database connection for the worker"""
+    await init_db()
+
+async def shutdown(ctx):
+    """Close worker connections"""
+    await close_db()
+    await close_cache()
+    await close_http_client()
+    stop_logging()
+
+class WorkerSettings:
+    """Arq worker configuration"""
+    functions = [
+        # Analyses time out internally after MAX_ANALYSIS_TIME, leave headroom for status updates
+        func(run_analysis_job, name="run_analysis_task", timeout=get_settings().max_analysis_time + 60, max_tries=1)
+    ]
+    queue_name = ANALYSIS_QUEUE
+    redis_settings = get_redis_settings()
+    max_jobs = get_settings().max_concurrent_analyses
+    on_startup = startup
+    on_shutdown = shutdown
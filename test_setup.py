@@ -8,6 +8,24 @@ import sys
 import subprocess
 from pathlib import Path
 
+# Directory listings read so far, so each parent directory is scanned once
+_listings = {}
+
+def _children(directory):
+    """Names in a directory from a single scandir, cached per directory"""
+    if directory not in _listings:
+        try:
+            with os.scandir(directory) as entries:
+                _listings[directory] = {entry.name for entry in entries}
+        except OSError:
+            _listings[directory] = set()
+    return _listings[directory]
+
+def _exists(path):
+    """Check a relative path exists using the cached listing of its parent"""
+    path = Path(path)
+    return path.name in _children(path.parent)
+
 def test_python_dependencies():
     """Test if Python dependencies can be imported"""
     print("🐍 Testing Python dependencies...")
@@ -16,7 +34,6 @@ def test_python_dependencies():
         import fastapi
         import uvicorn
         import pydantic
-        import git
         import httpx
         print("✅ Python dependencies OK")
         return True
@@ -78,7 +95,7 @@ def test_directory_structure():
     ]
     
     for dir_path in required_dirs:
-        if not Path(dir_path).exists():
+        if not _exists(dir_path):
             print(f"❌ Directory not found: {dir_path}")
             return False
     
@@ -103,7 +120,7 @@ def test_backend_files():
     ]
     
     for file_path in required_files:
-        if not Path(file_path).exists():
+        if not _exists(file_path):
             print(f"❌ File not found: {file_path}")
             return False
     
@@ -129,7 +146,7 @@ def test_frontend_files():
     ]
     
     for file_path in required_files:
-        if not Path(file_path).exists():
+        if not _exists(file_path):
             print(f"❌ File not found: {file_path}")
             return False
     